@@ -1,3 +1,4 @@
+import asyncio
 import multiprocessing as mp
 import os
 import sys
@@ -5,8 +6,14 @@ from pathlib import Path
 
 from async_tkinter_loop import async_mainloop
 
+from df_translation_client.downloaders.abstract_downloader import close_downloaders
 from df_translation_client.main_window import MainWindow
 from df_translation_client.utils.config import Config
+from df_translation_client.utils.po_languages import (
+    codepage_table,
+    po_index,
+    shutdown_process_pool,
+)
 
 
 class App:
@@ -32,6 +39,9 @@ class App:
 
         if not ignore_config_file:
             self.config.load_settings(self.get_config_path())
+            data_dir = self.config.get_data_dir()
+            po_index.load_index(data_dir / ".df-translate-index.json")
+            codepage_table.load_table(data_dir / ".df-translate-codepages.bin")
 
         self.main_window = MainWindow(self)
 
@@ -39,7 +49,13 @@ class App:
             self.setup_config_autosave(self.main_window, self.config)
 
     def run(self):
-        async_mainloop(self.main_window)
+        try:
+            async_mainloop(self.main_window)
+        finally:
+            # The tasks created while the window is destroyed don't get to run after the main loop has stopped,
+            # so close the downloaders on the same event loop before exiting
+            asyncio.get_event_loop_policy().get_event_loop().run_until_complete(close_downloaders())
+            shutdown_process_pool()
 
 
 def main():
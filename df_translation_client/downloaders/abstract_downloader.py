@@ -1,10 +1,44 @@
+import asyncio
+import weakref
 from abc import ABC, abstractmethod
-from typing import AsyncIterable, List
+from typing import AsyncIterable, List, Optional
+
+import httpx
 
 from df_translation_client.downloaders.common import DownloadStage
 
+_open_downloaders: "weakref.WeakSet[AbstractDownloader]" = weakref.WeakSet()
+
 
 class AbstractDownloader(ABC):
+    """
+    Base class of the downloaders.
+
+    Keeps a pooled HTTP client which is opened on the first use and is reused until close() is called,
+    so the connections (and TLS sessions) are shared between connect() and the downloads.
+    """
+
+    def __init__(self, max_connections: int = 10, max_keepalive_connections: int = 5, keepalive_expiry: float = 30.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits)
+            _open_downloaders.add(self)
+        return self._client
+
+    async def close(self) -> None:
+        _open_downloaders.discard(self)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     @abstractmethod
     async def connect(self) -> None:
         raise NotImplementedError
@@ -30,3 +64,8 @@ class AbstractDownloader(ABC):
     @abstractmethod
     async def list_languages(self, project: str, resource_slug: str) -> List[str]:
         raise NotImplementedError
+
+
+async def close_downloaders() -> None:
+    """Close the clients of all downloaders which are still open, e.g. on exit"""
+    await asyncio.gather(*(downloader.close() for downloader in list(_open_downloaders)))
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import NamedTuple, Optional
+from typing import Mapping, NamedTuple, Optional
 
 
 class StatusEnum(Enum):
@@ -7,9 +7,18 @@ class StatusEnum(Enum):
     RETRY = "retry..."
     FAILED = "failed"
     OK = "ok!"
+    UP_TO_DATE = "up to date"
+
+
+# Statuses of the last stage of a resource
+FINAL_STATUSES = frozenset({StatusEnum.OK, StatusEnum.UP_TO_DATE, StatusEnum.FAILED})
 
 
 class DownloadStage(NamedTuple):
     resource: str
     status: StatusEnum
     error_text: Optional[str]
+    bytes_transferred: int = 0
+    elapsed: float = 0.0  # Seconds from the start of the attempt
+    http_status: Optional[int] = None
+    timings: Optional[Mapping[str, float]] = None  # Seconds spent in the phases of the request (connect, tls, wait...)
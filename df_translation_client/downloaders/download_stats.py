@@ -0,0 +1,138 @@
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from df_translation_client.downloaders.common import DownloadStage, StatusEnum
+
+# Names of the httpcore trace events -> phases of a request
+TRACE_PHASES = {
+    "connect_tcp": "connect",  # Includes DNS resolution
+    "start_tls": "tls",
+    "send_request_headers": "send",
+    "send_request_body": "send",
+    "receive_response_headers": "wait",  # Time to the first byte: the server
+    "receive_response_body": "receive",
+}
+
+
+class TransferStats:
+    """Counters and timings of a single download, the timings of the request phases are collected with httpx tracing"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.bytes_transferred = 0
+        self.http_status: Optional[int] = None
+        self._timings: Dict[str, float] = dict()
+        self._phase_started: Dict[str, float] = dict()
+
+    async def trace(self, event_name: str, _info: dict):
+        """Callback for the "trace" extension of httpx requests"""
+        name, _, state = event_name.rpartition(".")
+        phase = TRACE_PHASES.get(name.rpartition(".")[2])
+        if phase is None:
+            return
+
+        if state == "started":
+            self._phase_started[name] = time.perf_counter()
+        elif name in self._phase_started:
+            self.add_time(phase, time.perf_counter() - self._phase_started.pop(name))
+
+    def add_time(self, phase: str, seconds: float):
+        self._timings[phase] = self._timings.get(phase, 0.0) + seconds
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        timings = dict(self._timings)
+        if "disk" in timings and "receive" in timings:
+            # The response body is received while the chunks are written to the disk
+            timings["receive"] = max(0.0, timings["receive"] - timings["disk"])
+        return timings
+
+    def make_stage(self, resource: str, status: StatusEnum, error_text: Optional[str] = None) -> DownloadStage:
+        return DownloadStage(
+            resource,
+            status,
+            error_text,
+            bytes_transferred=self.bytes_transferred,
+            elapsed=self.elapsed,
+            http_status=self.http_status,
+            timings=self.timings,
+        )
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = "GB"
+    return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} B"
+
+
+def format_throughput(size: int, seconds: float) -> str:
+    return format_size(size / seconds if seconds > 0 else 0) + "/s"
+
+
+class DownloadLog:
+    """Structured JSON log of a download run, one file per run"""
+
+    max_logs = 20
+
+    def __init__(self, log_dir: Optional[Path], project: str, language: str):
+        self.log_dir = log_dir
+        self.project = project
+        self.language = language
+        self.started = datetime.now()
+        self._started_counter = time.perf_counter()
+        self.stages: List[dict] = []
+
+    def add(self, stage: DownloadStage):
+        if stage.status == StatusEnum.DOWNLOADING:
+            return
+
+        self.stages.append(
+            dict(
+                time=round(time.perf_counter() - self._started_counter, 3),
+                resource=stage.resource,
+                status=stage.status.name,
+                bytes=stage.bytes_transferred,
+                elapsed=round(stage.elapsed, 3),
+                http_status=stage.http_status,
+                timings={phase: round(seconds, 3) for phase, seconds in (stage.timings or dict()).items()},
+                error=stage.error_text,
+            )
+        )
+
+    def save(self):
+        if self.log_dir is None:
+            return
+
+        elapsed = time.perf_counter() - self._started_counter
+        total_bytes = sum(stage["bytes"] for stage in self.stages)
+        data = dict(
+            project=self.project,
+            language=self.language,
+            started=self.started.isoformat(timespec="seconds"),
+            elapsed=round(elapsed, 3),
+            bytes=total_bytes,
+            throughput=round(total_bytes / elapsed) if elapsed > 0 else None,
+            stages=self.stages,
+        )
+
+        try:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            log_path = self.log_dir / f"download-{self.started:%Y%m%d-%H%M%S-%f}.json"
+            with open(log_path, "w", encoding="utf-8") as log_file:
+                json.dump(data, log_file, indent=1)
+
+            for old_log in sorted(self.log_dir.glob("download-*.json"))[: -self.max_logs]:
+                old_log.unlink()
+        except OSError:
+            pass  # The log is not essential
@@ -1,11 +1,28 @@
+import asyncio
 import io
+import json
+import os
+import random
+import time
 import traceback
-from typing import AsyncIterable, List, Mapping
+from pathlib import Path
+from typing import AsyncIterable, Dict, List, Mapping, Optional
 
 import httpx
 
 from df_translation_client.downloaders.abstract_downloader import AbstractDownloader
 from df_translation_client.downloaders.common import DownloadStage, StatusEnum
+from df_translation_client.downloaders.download_stats import DownloadLog, TransferStats
+from df_translation_client.downloaders.http_cache import HttpCache
+from df_translation_client.utils.file_manifest import FileManifest, new_hash
+
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_transient_error(error: Exception) -> bool:
+    if isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code in RETRY_STATUS_CODES
 
 
 class GithubDownloader(AbstractDownloader):
@@ -13,14 +30,215 @@ class GithubDownloader(AbstractDownloader):
 
     metadata: Mapping[str, Mapping[str, Mapping[str, str]]]
     projects: List[str]
+    metadata_timestamp: Optional[float] = None  # When the metadata was received or confirmed to be up to date
+    offline: bool = False  # The metadata is loaded from the cache because the server is unavailable
+
+    def __init__(
+        self,
+        max_concurrent_downloads: int = 4,
+        cache_dir: Optional[Path] = None,
+        base_url: str = BASE_URL,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0,
+        max_connections: int = 10,
+    ):
+        super().__init__(max_connections=max_connections)
+        self.max_concurrent_downloads = max(1, max_concurrent_downloads)
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.base_url = base_url
+        self.cache_dir = cache_dir
+
+        if cache_dir is not None:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            self.http_cache = HttpCache(cache_dir / "http-cache.json")
+        else:
+            self.http_cache = HttpCache()
+
+        # Validators of the responses which the .part files were started from, to resume them safely
+        self._partial_validators: Dict[str, str] = dict()
+        self._manifests: Dict[str, FileManifest] = dict()
+
+    @property
+    def metadata_file(self) -> Optional[Path]:
+        return self.cache_dir / "metadata-v2.json" if self.cache_dir else None
+
+    def load_cached_metadata(self) -> bool:
+        """Load the metadata saved by the last connect(), without network access"""
+        if self.metadata_file is None:
+            return False
+
+        try:
+            with open(self.metadata_file, encoding="utf-8") as file:
+                self.metadata = json.load(file)
+            self.metadata_timestamp = os.path.getmtime(self.metadata_file)
+        except (OSError, ValueError):
+            return False
+
+        self.projects = list(self.metadata)
+        return True
 
     async def connect(self) -> None:
-        url = GithubDownloader.BASE_URL + "metadata-v2.json"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            self.metadata = response.json()
-            self.projects = list(self.metadata)
+        url = self.base_url + "metadata-v2.json"
+        metadata_file = self.metadata_file
+
+        headers = self.http_cache.get_headers(url, metadata_file) if metadata_file else None
+        try:
+            response = await self.client.get(url, headers=headers)
+        except httpx.TransportError:
+            if not self.load_cached_metadata():
+                raise
+
+            self.offline = True
+            return
+
+        self.offline = False
+
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            os.utime(metadata_file)  # The mtime of the file is the time of the last check
+            self.http_cache.refresh(url, metadata_file)
+            self.http_cache.save()
+            self.load_cached_metadata()
+            return
+
+        response.raise_for_status()
+        self.metadata = response.json()
+        self.projects = list(self.metadata)
+        self.metadata_timestamp = time.time()
+
+        if metadata_file:
+            metadata_file.write_bytes(response.content)
+            self.http_cache.update(url, metadata_file, response.headers)
+            self.http_cache.save()
+
+    def get_retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter, so the parallel downloads don't retry at the same moment"""
+        delay = min(self.max_retry_delay, self.retry_delay * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _download_file(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        file_name: str,
+        stats: Optional[TransferStats] = None,
+    ) -> bool:
+        """
+        Download the url into file_name. Returns False if the local file is up to date.
+
+        The data is written into a .part file which is renamed to file_name on success,
+        unless file_name already has the same content (the hash is calculated while downloading).
+        If the .part file is left by an interrupted attempt, the download is resumed with a Range request.
+        """
+        part_file_name = file_name + ".part"
+        headers = self.http_cache.get_headers(url, file_name)
+
+        validator = self._partial_validators.get(url)
+        offset = os.path.getsize(part_file_name) if validator and os.path.exists(part_file_name) else 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        if stats is None:
+            stats = TransferStats()
+
+        async with client.stream("GET", url, headers=headers, extensions=dict(trace=stats.trace)) as response:
+            stats.http_status = response.status_code
+            if response.status_code == httpx.codes.NOT_MODIFIED:
+                self._discard_partial(url, part_file_name)
+                return False
+
+            resumed = bool(offset) and response.status_code == httpx.codes.PARTIAL_CONTENT
+            if offset and not self._range_matches(response, offset):
+                restart = True  # The .part file doesn't match the file on the server anymore
+            else:
+                restart = False
+                response.raise_for_status()
+
+                validator = response.headers.get("etag") or response.headers.get("last-modified")
+                if validator:
+                    self._partial_validators[url] = validator
+
+                file_hash = new_hash()
+                with open(part_file_name, "r+b" if resumed else "wb") as file:
+                    if resumed:
+                        for chunk in iter(lambda: file.read(io.DEFAULT_BUFFER_SIZE), b""):
+                            file_hash.update(chunk)
+
+                    async for chunk in response.aiter_bytes(io.DEFAULT_BUFFER_SIZE):
+                        started = time.perf_counter()
+                        file_hash.update(chunk)
+                        file.write(chunk)
+                        stats.add_time("disk", time.perf_counter() - started)
+                        stats.bytes_transferred = response.num_bytes_downloaded
+
+        if restart:
+            self._discard_partial(url, part_file_name)
+            return await self._download_file(client, url, file_name, stats)
+
+        self._partial_validators.pop(url, None)
+        replaced = self.get_manifest(file_name).replace_file(part_file_name, file_name, file_hash.hexdigest())
+        self.http_cache.update(url, file_name, response.headers)
+        return replaced
+
+    @staticmethod
+    def _range_matches(response: httpx.Response, offset: int) -> bool:
+        if response.status_code == httpx.codes.REQUESTED_RANGE_NOT_SATISFIABLE:
+            return False
+        if response.status_code == httpx.codes.PARTIAL_CONTENT:
+            return response.headers.get("content-range", "").startswith(f"bytes {offset}-")
+        return True  # The whole file is sent
+
+    def get_manifest(self, file_name: str) -> FileManifest:
+        directory = os.path.dirname(os.path.abspath(file_name))
+        manifest = self._manifests.get(directory)
+        if manifest is None:
+            manifest = self._manifests[directory] = FileManifest(directory)
+        return manifest
+
+    def save_manifests(self):
+        for manifest in self._manifests.values():
+            manifest.save()
+        self._manifests.clear()
+
+    def _discard_partial(self, url: str, part_file_name: str):
+        self._partial_validators.pop(url, None)
+        if os.path.exists(part_file_name):
+            os.remove(part_file_name)
+
+    async def _download_resource(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+        stages: "asyncio.Queue[Optional[DownloadStage]]",
+        project: str,
+        language: str,
+        resource: str,
+        file_path_pattern: str,
+    ) -> None:
+        async with semaphore:
+            await stages.put(DownloadStage(resource, StatusEnum.DOWNLOADING, None))
+            attempt = 0
+            while True:
+                stats = TransferStats()
+                try:
+                    url = self.base_url + "translations/" + self.metadata[project][resource][language]
+                    file_name = file_path_pattern.format(resource=resource, language=language)
+                    downloaded = await self._download_file(client, url, file_name, stats)
+                except Exception as error:
+                    if attempt < self.max_retries and is_transient_error(error):
+                        await stages.put(stats.make_stage(resource, StatusEnum.RETRY, traceback.format_exc()))
+                        await asyncio.sleep(self.get_retry_delay(attempt))
+                        attempt += 1
+                        continue
+
+                    await stages.put(stats.make_stage(resource, StatusEnum.FAILED, traceback.format_exc()))
+                else:
+                    status = StatusEnum.OK if downloaded else StatusEnum.UP_TO_DATE
+                    await stages.put(stats.make_stage(resource, status))
+                break
 
     async def async_downloader(
         self,
@@ -29,22 +247,40 @@ class GithubDownloader(AbstractDownloader):
         resources: List[str],
         file_path_pattern: str,
     ) -> AsyncIterable[DownloadStage]:
-        async with httpx.AsyncClient() as client:
-            for resource in resources:
-                yield DownloadStage(resource, StatusEnum.DOWNLOADING, None)
-                file_name = self.metadata[project][resource][language]
-                url = GithubDownloader.BASE_URL + "translations/" + file_name
-                try:
-                    async with client.stream("GET", url) as response:
-                        response.raise_for_status()
-                        file_name = file_path_pattern.format(resource=resource, language=language)
-                        with open(file_name, "wb") as file:
-                            async for chunk in response.aiter_bytes(io.DEFAULT_BUFFER_SIZE):
-                                file.write(chunk)
-                except Exception:
-                    yield DownloadStage(resource, StatusEnum.FAILED, traceback.format_exc())
-                else:
-                    yield DownloadStage(resource, StatusEnum.OK, None)
+        """Download up to max_concurrent_downloads resources at once, yielding stages as soon as they happen"""
+        stages: "asyncio.Queue[Optional[DownloadStage]]" = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrent_downloads)
+        log = DownloadLog(self.cache_dir / "logs" if self.cache_dir else None, project, language)
+
+        client = self.client
+
+        async def download_all():
+            try:
+                await asyncio.gather(
+                    *(
+                        self._download_resource(
+                            client, semaphore, stages, project, language, resource, file_path_pattern
+                        )
+                        for resource in resources
+                    )
+                )
+            finally:
+                await stages.put(None)  # All downloads are finished
+
+        task = asyncio.create_task(download_all())
+        try:
+            while True:
+                stage = await stages.get()
+                if stage is None:
+                    break
+                log.add(stage)
+                yield stage
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            self.http_cache.save()
+            log.save()
+            self.save_manifests()
 
     async def list_projects(self) -> List[str]:
         return list(self.projects)
@@ -0,0 +1,83 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Union
+
+
+class HttpCache:
+    """
+    Stores ETag and Last-Modified values of the downloaded files to make conditional requests.
+
+    The validators are used only while the local copy of the file is unchanged (the same size and mtime),
+    otherwise the file is downloaded in full.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        self.cache_path = cache_path
+        self._entries: Dict[str, dict] = dict()
+
+        if cache_path is not None:
+            try:
+                with open(cache_path, encoding="utf-8") as cache_file:
+                    self._entries = dict(json.load(cache_file))
+            except (FileNotFoundError, ValueError, TypeError):
+                pass
+
+    def save(self):
+        if self.cache_path is None:
+            return
+
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as cache_file:
+                json.dump(self._entries, cache_file, indent=1, sort_keys=True)
+        except OSError:
+            pass  # The cache is only an optimization
+
+    @staticmethod
+    def _normalize_path(path: Union[str, Path]) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def get_headers(self, url: str, file_name: Union[str, Path]) -> Dict[str, str]:
+        """Get headers for a conditional request of the url which is downloaded into file_name"""
+        entry = self._entries.get(url)
+        if entry is None or entry["file"] != self._normalize_path(file_name):
+            return dict()
+
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            return dict()
+
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            return dict()
+
+        headers = dict()
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, file_name: Union[str, Path], response_headers: Mapping[str, str]):
+        etag = response_headers.get("etag")
+        last_modified = response_headers.get("last-modified")
+
+        if not etag and not last_modified:
+            self._entries.pop(url, None)
+            return
+
+        stat = os.stat(file_name)
+        self._entries[url] = dict(
+            file=self._normalize_path(file_name),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    def refresh(self, url: str, file_name: Union[str, Path]):
+        """Keep the validators of the url valid after the local file was touched (not changed)"""
+        entry = self._entries.get(url)
+        if entry is not None:
+            stat = os.stat(file_name)
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
@@ -0,0 +1,74 @@
+import json
+import os
+import traceback
+from pathlib import Path
+from typing import AsyncIterable, List, Mapping
+
+from df_translation_client.downloaders.abstract_downloader import AbstractDownloader
+from df_translation_client.downloaders.common import DownloadStage, StatusEnum
+from df_translation_client.downloaders.download_stats import TransferStats
+from df_translation_client.utils.async_tasks import run_in_executor
+from df_translation_client.utils.file_manifest import FileManifest, copy_file
+
+
+def read_metadata(metadata_path: Path) -> Mapping[str, Mapping[str, Mapping[str, str]]]:
+    with open(metadata_path, encoding="utf-8") as metadata_file:
+        return json.load(metadata_file)
+
+
+def copy_resource(source_path: Path, file_name: str, manifest: FileManifest, stats: TransferStats) -> bool:
+    part_file_name = file_name + ".part"
+    with open(source_path, "rb") as source:
+        file_hash = copy_file(source, part_file_name)
+        stats.bytes_transferred = source.tell()
+    return manifest.replace_file(part_file_name, file_name, file_hash)
+
+
+class LocalMirrorDownloader(AbstractDownloader):
+    """
+    Takes translations from a local copy (e.g. a git checkout) of the translations-backup repository,
+    with the same metadata-v2.json layout as GithubDownloader uses.
+    """
+
+    metadata: Mapping[str, Mapping[str, Mapping[str, str]]]
+    projects: List[str]
+
+    def __init__(self, mirror_dir: Path):
+        super().__init__()
+        self.mirror_dir = Path(mirror_dir)
+
+    async def connect(self) -> None:
+        self.metadata = await run_in_executor(read_metadata, self.mirror_dir / "metadata-v2.json")
+        self.projects = list(self.metadata)
+
+    async def async_downloader(
+        self,
+        project: str,
+        language: str,
+        resources: List[str],
+        file_path_pattern: str,
+    ) -> AsyncIterable[DownloadStage]:
+        manifest = FileManifest(os.path.dirname(os.path.abspath(file_path_pattern)))
+        try:
+            for resource in resources:
+                yield DownloadStage(resource, StatusEnum.DOWNLOADING, None)
+                stats = TransferStats()
+                try:
+                    source_path = self.mirror_dir / "translations" / self.metadata[project][resource][language]
+                    file_name = file_path_pattern.format(resource=resource, language=language)
+                    copied = await run_in_executor(copy_resource, source_path, file_name, manifest, stats)
+                except Exception:
+                    yield stats.make_stage(resource, StatusEnum.FAILED, traceback.format_exc())
+                else:
+                    yield stats.make_stage(resource, StatusEnum.OK if copied else StatusEnum.UP_TO_DATE)
+        finally:
+            manifest.save()
+
+    async def list_projects(self) -> List[str]:
+        return list(self.projects)
+
+    async def list_resources(self, project: str) -> List[str]:
+        return list(self.metadata[project])
+
+    async def list_languages(self, project: str, resource_slug: str) -> List[str]:
+        return list(self.metadata[project][resource_slug])
@@ -1,3 +1,4 @@
+import asyncio
 import re
 import tkinter as tk
 from copy import deepcopy
@@ -148,6 +149,17 @@ class DialogDoNotFixSpaces(tk.Toplevel):
         self.exclusions = None
         self.destroy()
 
-    def wait_result(self):
-        self.wait_window()
+    async def wait_result(self) -> Optional[MutableMapping[str, List[str]]]:
+        """
+        Wait until the dialog is closed. Unlike wait_window(), it doesn't run a nested Tk loop,
+        so the other asyncio tasks keep running while the dialog is open.
+        """
+        closed = asyncio.get_running_loop().create_future()
+
+        def on_destroy(event):
+            if event.widget is self and not closed.done():
+                closed.set_result(None)
+
+        self.bind("<Destroy>", on_destroy, add=True)
+        await closed
         return self.exclusions
@@ -1,11 +1,12 @@
 import importlib
 import tkinter as tk
 from tkinter import ttk
-from typing import Iterable, Optional, Tuple
+from typing import Callable, Iterable, Optional, Tuple
 
 from dfrus import dfrus
 from tkinter_layout_helpers import pack_manager
 
+from df_translation_client.utils.po_languages import reload_cleanup_functions
 from df_translation_client.widgets import BisectTool
 
 
@@ -13,15 +14,28 @@ class DebugFrame(tk.Frame):
     @staticmethod
     def reload():
         importlib.reload(dfrus)
+        reload_cleanup_functions()
 
-    def __init__(self, *args, dictionary: Optional[Iterable[Tuple[str, str]]] = None, **kwargs):
+    def bt_reload(self):
+        self.reload()
+        if self.on_reload is not None:
+            self.on_reload()
+
+    def __init__(
+        self,
+        *args,
+        dictionary: Optional[Iterable[Tuple[str, str]]] = None,
+        on_reload: Optional[Callable[[], None]] = None,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
+        self.on_reload = on_reload
         with pack_manager(self) as packer:
             if dictionary is not None:
                 dictionary = list(dictionary)
             self.bisect = BisectTool(self, strings=dictionary)
 
-            packer.pack(ttk.Button(text="Reload dfrus", command=self.reload)).pack_expanded(self.bisect)
+            packer.pack(ttk.Button(text="Reload dfrus", command=self.bt_reload)).pack_expanded(self.bisect)
 
     def set_dictionary(self, dictionary: Iterable[Tuple[str, str]]):
         self.bisect.strings = list(dictionary)
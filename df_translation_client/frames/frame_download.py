@@ -1,31 +1,47 @@
 import asyncio
 import platform
 import subprocess
+import time
 import tkinter as tk
 import traceback
 from asyncio import Task
+from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 from typing import List, Optional
 
 from async_tkinter_loop import async_handler
 from tkinter_layout_helpers import grid_manager
 
 from df_translation_client.downloaders.abstract_downloader import AbstractDownloader
-from df_translation_client.downloaders.common import DownloadStage, StatusEnum
+from df_translation_client.downloaders.common import (
+    FINAL_STATUSES,
+    DownloadStage,
+    StatusEnum,
+)
+from df_translation_client.downloaders.download_stats import (
+    format_size,
+    format_throughput,
+)
 from df_translation_client.downloaders.github import GithubDownloader
+from df_translation_client.downloaders.github_archive import GithubArchiveDownloader
+from df_translation_client.downloaders.local_mirror import LocalMirrorDownloader
+from df_translation_client.utils.async_tasks import SingleTask, create_task
 from df_translation_client.utils.config import Config
 from df_translation_client.widgets import FileEntry, ScrollbarFrame, TwoStateButton
 from df_translation_client.widgets.custom_widgets import (
     Combobox,
     Listbox,
+    ThrottledListboxUpdater,
     TypedCombobox,
 )
 
 
 class DownloadFromEnum(Enum):
     GITHUB = "Github (data updates at midnight GMT+00)"
+    GITHUB_ARCHIVE = "Github, all files in one archive"
+    LOCAL_MIRROR = "Local copy of translations-backup"
 
     def __str__(self):
         return self.value
@@ -46,59 +62,141 @@ class DownloadTranslationsFrame(tk.Frame):
     resources: Optional[List[str]] = None
     downloader_task: Optional[Task] = None
 
-    @async_handler
-    async def bt_connect(self):
+    def create_downloader(self) -> Optional[AbstractDownloader]:
         download_from = self.combo_download_from.get()
 
+        if download_from is DownloadFromEnum.LOCAL_MIRROR:
+            mirror_dir = filedialog.askdirectory(
+                title="Choose a local copy of translations-backup",
+                initialdir=self.config_section.get("mirror_dir", ""),
+            )
+            if not mirror_dir:
+                return None
+
+            self.config_section["mirror_dir"] = mirror_dir
+            self.close_downloader()
+            self.downloader_api = LocalMirrorDownloader(Path(mirror_dir))
+            return self.downloader_api
+
         if download_from is DownloadFromEnum.GITHUB:
-            self.downloader_api = GithubDownloader()
+            downloader_class = GithubDownloader
+        elif download_from is DownloadFromEnum.GITHUB_ARCHIVE:
+            downloader_class = GithubArchiveDownloader
+        else:
+            return None
+
+        if type(self.downloader_api) is not downloader_class:
+            # Otherwise reuse the downloader with its open connections
+            self.close_downloader()
+            self.downloader_api = downloader_class(
+                max_concurrent_downloads=self.config_section["max_concurrent_downloads"],
+                max_retries=self.config_section["max_retries"],
+                max_connections=self.config_section["max_connections"],
+                cache_dir=self.cache_dir,
+            )
 
+        return self.downloader_api
+
+    async def update_lists(self):
+        self.projects = await self.downloader_api.list_projects()
+        project = self.projects[0]
+        self.resources = await self.downloader_api.list_resources(project)
+        resource = self.resources[0]
+        languages = await self.downloader_api.list_languages(project, resource)
+
+        self.combo_projects.values = sorted(self.projects)
+        self.combo_languages.values = sorted(languages)
+        last_language = self.config_section.get("language", None)
+
+        if last_language and last_language in languages:
+            self.combo_languages.text = last_language
         else:
+            self.combo_languages.current(0)
+
+        self.listbox_resources.clear()
+        self.listbox_resources.values = tuple(res for res in self.resources)
+
+    def load_cached_metadata(self):
+        """Fill the lists from the cached metadata at once, then refresh it in the background"""
+        downloader = self.create_downloader()
+        if isinstance(downloader, GithubDownloader) and downloader.load_cached_metadata():
+            self.refresh_task.start(self.refresh_metadata(downloader.metadata))
+
+    async def refresh_metadata(self, cached_metadata):
+        await self.update_lists()
+        try:
+            await self.downloader_api.connect()
+        except Exception:
+            traceback.print_exc()
             return
 
+        if self.downloader_api.metadata != cached_metadata:
+            await self.update_lists()
+
+    @async_handler
+    async def bt_connect(self):
+        if self.create_downloader() is None:
+            return
+
+        self.refresh_task.cancel()
         self.button_connect.config(state=tk.DISABLED)
 
         try:
             await self.downloader_api.connect()
-            self.projects = await self.downloader_api.list_projects()
-            project = self.projects[0]
-            self.resources = await self.downloader_api.list_resources(project)
-            resource = self.resources[0]
-            languages = await self.downloader_api.list_languages(project, resource)
+            await self.update_lists()
         except Exception as err:
             traceback.print_exc()
             messagebox.showerror("Error", str(err))
             return
         else:
-            self.combo_projects.values = sorted(self.projects)
-            self.combo_languages.values = sorted(languages)
-            last_language = self.config_section.get("language", None)
-
-            if last_language and last_language in languages:
-                self.combo_languages.text = last_language
-            else:
-                self.combo_languages.current(0)
-
-            self.listbox_resources.clear()
-            self.listbox_resources.values = tuple(res for res in self.resources)
+            if isinstance(self.downloader_api, GithubDownloader) and self.downloader_api.offline:
+                timestamp = datetime.fromtimestamp(self.downloader_api.metadata_timestamp)
+                messagebox.showwarning(
+                    "Offline",
+                    f"Server is unavailable, using the data cached at {timestamp:%Y-%m-%d %H:%M}",
+                )
         finally:
             self.button_connect.config(state=tk.ACTIVE)
 
     async def downloader(self, project: str, language: str, download_dir: Path):
-        lines = {res: res for res in self.resources}  # { "resource": "resource - status" }
+        rows = {res: i for i, res in enumerate(self.resources)}
+        errors: List[str] = []  # Other resources are still downloaded if some of them failed
+        started = time.perf_counter()
+        total_bytes = 0
+        self.label_stats["text"] = ""
 
         file_path_pattern = str(download_dir / "{resource}_{language}.po")
-        async for stage in self.downloader_api.async_downloader(project, language, self.resources, file_path_pattern):
-            stage: DownloadStage
-            lines[stage.resource] = "{} - {}".format(stage.resource, stage.status.value)
-            self.listbox_resources.values = list(lines.values())
-            self.update()
+        try:
+            async for stage in self.downloader_api.async_downloader(
+                project, language, self.resources, file_path_pattern
+            ):
+                stage: DownloadStage
+                line = "{} - {}".format(stage.resource, stage.status.value)
+                if stage.bytes_transferred:
+                    line += " ({}, {})".format(
+                        format_size(stage.bytes_transferred),
+                        format_throughput(stage.bytes_transferred, stage.elapsed),
+                    )
+
+                if stage.bytes_transferred and stage.status in FINAL_STATUSES:
+                    # Only the last attempt of a resource is counted, not the data of the failed ones
+                    total_bytes += stage.bytes_transferred
+                    elapsed = time.perf_counter() - started
+                    self.label_stats["text"] = "{} in {:.1f} s, {}".format(
+                        format_size(total_bytes), elapsed, format_throughput(total_bytes, elapsed)
+                    )
+
+                self.listbox_updater.set_item(rows[stage.resource], line)
+
+                if stage.status in (StatusEnum.OK, StatusEnum.UP_TO_DATE):
+                    self.progressbar.step()
+                elif stage.status == StatusEnum.FAILED:
+                    errors.append(stage.error_text)
+        finally:
+            self.listbox_updater.flush()
 
-            if stage.status == StatusEnum.OK:
-                self.progressbar.step()
-            elif stage.status == StatusEnum.FAILED:
-                messagebox.showerror("Downloading error", stage.error_text)
-                break
+        if errors:
+            messagebox.showerror("Downloading error", errors[0])
         else:
             # Everything is downloaded
             self.button_download.reset_state()
@@ -156,10 +254,19 @@ class DownloadTranslationsFrame(tk.Frame):
                 self.downloader_task.cancel()
             return True
 
+    def close_downloader(self):
+        if self.downloader_api is not None:
+            create_task(self.downloader_api.close())
+            self.downloader_api = None
+
     def kill_background_tasks(self, _event):
         if self.downloader_task and not self.downloader_task.done():
             self.downloader_task.cancel()
 
+        self.refresh_task.cancel()
+        self.listbox_updater.cancel()
+        self.close_downloader()
+
     def on_combo_download_from_change(self, _event=None):
         # state = tk.DISABLED if self.combo_download_from.get() is DownloadFromEnum.GITHUB else tk.NORMAL
         self.combo_languages.values = []
@@ -182,9 +289,18 @@ class DownloadTranslationsFrame(tk.Frame):
 
         self.config_section = config.init_section(
             section_name="download_translations",
-            defaults=dict(recent_projects=["dwarf-fortress"]),
+            defaults=dict(
+                recent_projects=["dwarf-fortress"],
+                max_concurrent_downloads=4,
+                max_retries=3,
+                max_connections=10,
+            ),
         )
 
+        data_dir = config.get_data_dir()
+        self.cache_dir = data_dir / ".df-translate-cache" if data_dir else None
+        self.refresh_task = SingleTask()
+
         with grid_manager(self, sticky=tk.EW, padx=2, pady=2) as grid:
             self.combo_download_from = TypedCombobox[DownloadFromEnum](values=list(DownloadFromEnum))
             self.combo_download_from.select(DownloadFromEnum.GITHUB)
@@ -229,14 +345,19 @@ class DownloadTranslationsFrame(tk.Frame):
 
             grid.new_row().add(self.button_download).add(self.progressbar).column_span(2)
 
-            grid.new_row().add(tk.Label(text="Resources:")).column_span(3)
+            self.label_stats = tk.Label()
+            grid.new_row().add(tk.Label(text="Resources:"), sticky=tk.W).add(self.label_stats, sticky=tk.E).column_span(
+                2
+            )
 
             scrollbar_frame = ScrollbarFrame(widget_factory=Listbox, show_scrollbars=tk.VERTICAL)
             grid.new_row().add(scrollbar_frame, sticky=tk.NSEW).column_span(3).configure(weight=1)
 
             self.listbox_resources: Listbox = scrollbar_frame.widget
+            self.listbox_updater = ThrottledListboxUpdater(self.listbox_resources)
 
             grid.columnconfigure(1, weight=1)
 
         self.on_combo_download_from_change()
+        self.load_cached_metadata()
         self.bind("<Destroy>", self.kill_background_tasks, add=False)
@@ -4,117 +4,198 @@ from pathlib import Path
 from tkinter import messagebox, ttk
 from typing import Optional
 
+from async_tkinter_loop import async_handler
 from dfrus import dfrus
 from natsort import natsorted
 from tkinter_layout_helpers import grid_manager
 
 from df_translation_client.frames.dialog_do_not_fix_spaces import DialogDoNotFixSpaces
 from df_translation_client.frames.frame_debug import DebugFrame
+from df_translation_client.utils.async_tasks import SingleTask
 from df_translation_client.utils.config import Config
+from df_translation_client.utils.patch_worker import (
+    PatchWorker,
+    receive_output,
+    run_job,
+    run_patch,
+    run_patch_with_translation_file,
+)
 from df_translation_client.utils.po_languages import (
-    get_suitable_codepages_for_file,
-    load_dictionary_raw,
-    load_dictionary_with_cleanup,
+    CleanedDictionary,
+    async_get_suitable_codepages_for_file,
+    async_load_dictionary_raw,
+    async_load_dictionary_with_cleanup,
 )
+from df_translation_client.utils.shared_dictionary import write_temporary_dictionary
 from df_translation_client.widgets import FileEntry, ScrollbarFrame, TwoStateButton
-from df_translation_client.widgets.custom_widgets import Checkbutton, Combobox, Text
+from df_translation_client.widgets.custom_widgets import (
+    Checkbutton,
+    Combobox,
+    Entry,
+    LogView,
+)
 
 
-class ProcessMessageWrapper:
-    _chunk_size = 1024
+class PatchExecutableFrame(tk.Frame):
+    log_max_chunk = 256 * 1024  # Limit of the output shown at once, so the GUI doesn't freeze on a large burst
+    log_min_delay = 20  # ms
+    log_max_delay = 200  # ms
 
-    def __init__(self, message_receiver):
-        self._message_receiver = message_receiver
-        self.encoding = "utf-8"
+    def update_log(self, message_queue, delay: int = log_min_delay):
+        try:
+            text, finished = receive_output(message_queue, self.log_max_chunk)
+            if text:
+                self.log_field.write(text)
 
-    def write(self, s):
-        for i in range(0, len(s), self._chunk_size):
-            self._message_receiver.send(s[i : i + self._chunk_size])
+            if finished or (not self.dfrus_process.is_alive() and not message_queue.poll()):
+                self.log_field.write("\n[PROCESS FINISHED]")
+                self.finish_patching(crashed=not finished)
+                return
+
+            # Drain the pipe quickly while there's output, back off while the process is silent
+            if message_queue.poll():
+                delay = 1
+            elif text:
+                delay = self.log_min_delay
+            else:
+                delay = min(delay * 2, self.log_max_delay)
 
-    def flush(self):
-        pass  # stub method
+            self.after(delay, self.update_log, message_queue, delay)
+        except (EOFError, BrokenPipeError, OSError):
+            self.log_field.write("\n[MESSAGE QUEUE/PIPE BROKEN]")
+            self.finish_patching(crashed=True)
 
+    def finish_patching(self, crashed: bool):
+        if self.log_field.dropped_lines and self.log_field.log_path is not None:
+            self.log_field.write(f"\n[Only the last lines are shown, the full log: {self.log_field.log_path}]")
+        self.log_field.flush()
 
-class PatchExecutableFrame(tk.Frame):
-    def update_log(self, message_queue):
-        try:
-            message = []
+        self.patch_running = False
+        self.button_patch.reset_state()
+        self.remove_dictionary_file()
+        if self.patch_worker is not None and self.dfrus_process is self.patch_worker.process:
+            self.patch_worker.job_finished(crashed)
 
-            while message_queue.poll():
-                message.append(message_queue.recv())
+    def remove_dictionary_file(self):
+        if self._dictionary_file is not None:
+            self._dictionary_file.unlink(missing_ok=True)
+            self._dictionary_file = None
 
-            self.log_field.write("".join(message))
+    def get_cleaned_dictionary(self) -> CleanedDictionary:
+        translation_file = self.fileentry_translation_file.path
 
-            if not self.dfrus_process.is_alive():
-                self.log_field.write("\n[PROCESS FINISHED]")
-                self.button_patch.reset_state()
-            else:
-                self.after(100, self.update_log, message_queue)
-        except (EOFError, BrokenPipeError):
-            self.log_field.write("\n[MESSAGE QUEUE/PIPE BROKEN]")
-            self.button_patch.reset_state()
+        if self._dictionary is None or not self._dictionary.is_actual(translation_file):
+            self._dictionary = CleanedDictionary(translation_file, self.exclusions)
+        else:
+            # Only the exclusions could be changed, so the dictionary is updated incrementally
+            self._dictionary.update_exclusions(self.exclusions)
+
+        return self._dictionary
 
     def bt_patch(self):
-        if self.dfrus_process is not None and self.dfrus_process.is_alive():
+        if self.patch_running:
             return False
 
         executable_file = self.file_entry_executable_file.path
+        translation_file = self.fileentry_translation_file.path
 
         if not Path(executable_file).exists():
             messagebox.showerror("Error", "Valid path to an executable file must be specified")
+        elif not self.debug_frame and not translation_file.is_file():
+            messagebox.showerror("Error", "Valid path to a translation file must be specified")
         else:
-            if not self.debug_frame:
-                with open(self.fileentry_translation_file.path, "r", encoding="utf-8") as translation_file:
-                    dictionary = dict(load_dictionary_with_cleanup(translation_file, self.exclusions))
-            else:
-                dictionary = dict(self.debug_frame.bisect.filtered_strings)
-
             self.config_section["last_encoding"] = self.combo_encoding.text
-
-            parent_conn, child_conn = mp.Pipe()
-
-            self.after(100, self.update_log, parent_conn)
             self.log_field.clear()
-            self.dfrus_process = mp.Process(
-                target=dfrus.run,
-                kwargs=dict(
-                    path=executable_file,
-                    dest="",
-                    trans_table=dictionary,
-                    codepage=self.combo_encoding.text,
-                    debug=self.chk_debug_output.is_checked,
-                    stdout=ProcessMessageWrapper(child_conn),
-                    stderr=ProcessMessageWrapper(child_conn),
-                ),
+
+            kwargs = dict(
+                path=executable_file,
+                dest="",
+                codepage=self.combo_encoding.text,
+                debug=self.chk_debug_output.is_checked,
             )
-            self.dfrus_process.start()
+
+            if not self.debug_frame and self.config_section["load_translation_in_child"]:
+                # The patching process loads the translation itself, the GUI doesn't build the dictionary at all
+                target = run_patch_with_translation_file
+                kwargs.update(
+                    translation_file=str(translation_file),
+                    exclusions_by_language=self.exclusions,
+                    keep_translation=self.config_section["keep_translation_in_worker"],
+                )
+            else:
+                if not self.debug_frame:
+                    dictionary = self.get_cleaned_dictionary().to_dict()
+                else:
+                    dictionary = dict(self.debug_frame.bisect.filtered_strings)
+
+                if self.config_section["shared_dictionary"]:
+                    # The default handoff: the child process maps the file instead of unpickling the whole table
+                    self.remove_dictionary_file()
+                    self._dictionary_file = write_temporary_dictionary(dictionary)
+                    target = run_patch
+                    kwargs.update(dictionary_path=str(self._dictionary_file))
+                else:
+                    target = dfrus.run
+                    kwargs.update(trans_table=dictionary)
+
+            if self.patch_worker is not None:
+                message_queue = self.patch_worker.submit(target, **kwargs)
+                self.dfrus_process = self.patch_worker.process
+            else:
+                message_queue, child_conn = mp.Pipe(duplex=False)
+                self.dfrus_process = mp.Process(target=run_job, args=(child_conn, target, kwargs))
+                self.dfrus_process.start()
+                child_conn.close()
+
+            self.patch_running = True
+            self.update_log(message_queue)
             return True
 
         return False
 
+    def bt_find_in_log(self, backwards: bool = False):
+        if not self.log_field.find(self.entry_log_search.text, backwards):
+            self.bell()
+
     def bt_stop(self):
         r = messagebox.showwarning("Are you sure?", "Stop the patching process?", type=messagebox.OKCANCEL)
         if r == "cancel":
             return False
         else:
-            self.dfrus_process.terminate()
+            if self.patch_worker is not None:
+                self.patch_worker.restart()  # The old process is terminated, a new one is prepared for the next job
+            else:
+                self.dfrus_process.terminate()
             return True
 
+    def on_dfrus_reload(self):
+        if self.patch_worker is not None:
+            self.patch_worker.recycle()  # The worker has to import the reloaded dfrus as well
+
     def kill_processes(self, _):
-        if self.dfrus_process and self.dfrus_process.is_alive():
+        self.combo_encoding_task.cancel()
+        self.debug_frame_task.cancel()
+
+        if self.patch_worker is not None:
+            self.patch_worker.stop()
+        elif self.dfrus_process and self.dfrus_process.is_alive():
             self.dfrus_process.terminate()
+            self.dfrus_process.join()
+
+        self.remove_dictionary_file()
 
-    def bt_exclusions(self):
+    @async_handler
+    async def bt_exclusions(self):
         translation_file_path = self.fileentry_translation_file.path
 
-        if translation_file_path.exists():
-            with open(translation_file_path, "r", encoding="utf-8") as translation_file:
-                dictionary, language = load_dictionary_raw(translation_file)
+        if translation_file_path.is_file():
+            dictionary, language = await async_load_dictionary_raw(translation_file_path)
+            dictionary = dict(dictionary)
         else:
             dictionary = None
             language = None
 
-        exclusions = DialogDoNotFixSpaces(
+        exclusions = await DialogDoNotFixSpaces(
             exclusions=self.config_section["fix_space_exclusions"],
             dictionary=dictionary,
             default_language=language,
@@ -142,27 +223,35 @@ class PatchExecutableFrame(tk.Frame):
         if self.translation_file_language:
             self.config_section["language_codepages"][self.translation_file_language] = event.widget.text
 
-    def update_combo_encoding_list(self, translation_file):
+    def set_combo_encoding_loading(self):
+        self.combo_encoding.values = tuple()
+        self.combo_encoding.text = "loading..."
+        self.combo_encoding.config(state=tk.DISABLED)
+
+    async def update_combo_encoding_list(self, translation_file):
+        self.set_combo_encoding_loading()
         try:
-            codepages, language = get_suitable_codepages_for_file(translation_file)
+            codepages, language = await async_get_suitable_codepages_for_file(translation_file)
             self.combo_encoding.values = natsorted(codepages)
             self.translation_file_language = language
         except Exception:
             self.translation_file_language = None
             self.combo_encoding.values = tuple()
+        finally:
+            self.combo_encoding.config(state=tk.NORMAL)
 
-    def config_combo_encoding(self, translation_file: Path):
-        self.update_combo_encoding_list(translation_file)
+    async def config_combo_encoding(self, translation_file: Path):
+        await self.update_combo_encoding_list(translation_file)
 
         if "last_encoding" in self.config_section:
             self.combo_encoding.text = self.config_section["last_encoding"]
         elif self.combo_encoding.values:
             self.combo_encoding.current(0)
+        else:
+            self.combo_encoding.text = ""
 
-        self.combo_encoding.bind("<<ComboboxSelected>>", func=self.save_encoding_into_config)
-
-    def update_combo_encoding(self, translation_file: Path):
-        self.update_combo_encoding_list(translation_file)
+    async def update_combo_encoding(self, translation_file: Path):
+        await self.update_combo_encoding_list(translation_file)
 
         if (
             self.translation_file_language
@@ -174,12 +263,16 @@ class PatchExecutableFrame(tk.Frame):
         else:
             self.combo_encoding.text = "cp437"
 
+    async def update_debug_frame(self, translation_file: Path):
+        if translation_file.is_file():
+            dictionary = await async_load_dictionary_with_cleanup(translation_file, self.exclusions)
+            self.debug_frame.set_dictionary(dictionary)
+
     def on_translation_file_change(self, file_path: Path):
         self.config_section.check_and_save_path("df_exe_translation_file", file_path)
-        self.update_combo_encoding(self.fileentry_translation_file.path)
-        if self.debug_frame and file_path.is_file():
-            with open(self.fileentry_translation_file.path, "r", encoding="utf-8") as translation_file:
-                self.debug_frame.set_dictionary(load_dictionary_with_cleanup(translation_file, self.exclusions))
+        self.combo_encoding_task.start(self.update_combo_encoding(self.fileentry_translation_file.path))
+        if self.debug_frame:
+            self.debug_frame_task.start(self.update_debug_frame(self.fileentry_translation_file.path))
 
     def __init__(self, *args, config: Config, debug=False, **kwargs):
         super().__init__(*args, **kwargs)
@@ -189,14 +282,31 @@ class PatchExecutableFrame(tk.Frame):
             defaults=dict(
                 fix_space_exclusions=dict(ru=["Histories of "]),
                 language_codepages=dict(),
+                shared_dictionary=True,
+                load_translation_in_child=False,
+                keep_translation_in_worker=False,
+                warm_worker=True,
+                log_max_lines=5000,
             ),
         )
 
         self.exclusions = self.config_section["fix_space_exclusions"]
 
         self.dfrus_process = None
+        self.patch_running = False
+
+        if self.config_section["warm_worker"]:
+            # Start the patching process in advance, so the modules are already imported when a patch is started
+            self.patch_worker = PatchWorker()
+            self.patch_worker.start()
+        else:
+            self.patch_worker = None
 
-        self._dictionary = None
+        self._dictionary: Optional[CleanedDictionary] = None
+        self._dictionary_file: Optional[Path] = None
+
+        self.combo_encoding_task = SingleTask()
+        self.debug_frame_task = SingleTask()
 
         with grid_manager(self, sticky=tk.EW, padx=2, pady=2) as grid:
             self.file_entry_executable_file = FileEntry(
@@ -225,7 +335,8 @@ class PatchExecutableFrame(tk.Frame):
             ).column_span(2)
 
             self.combo_encoding = Combobox()
-            self.config_combo_encoding(self.fileentry_translation_file.path)
+            self.combo_encoding.bind("<<ComboboxSelected>>", func=self.save_encoding_into_config)
+            self.combo_encoding_task.start(self.config_combo_encoding(self.fileentry_translation_file.path))
             grid.new_row().add(tk.Label(text="Encoding:"), sticky=tk.W).add(self.combo_encoding).column_span(2)
 
             # FIXME: chk_do_not_patch_charmap does nothing
@@ -248,12 +359,8 @@ class PatchExecutableFrame(tk.Frame):
             grid.new_row().add(self.chk_add_leading_trailing_spaces).column_span(2).add(button_exclusions)
 
             if debug:
-                if self.fileentry_translation_file.path.is_file():
-                    with open(self.fileentry_translation_file.path, "r", encoding="utf-8") as translation_file:
-                        dictionary = load_dictionary_with_cleanup(translation_file, self.exclusions)
-                else:
-                    dictionary = None
-                self.debug_frame = DebugFrame(dictionary=dictionary)
+                self.debug_frame = DebugFrame(on_reload=self.on_dfrus_reload)
+                self.debug_frame_task.start(self.update_debug_frame(self.fileentry_translation_file.path))
 
                 grid.new_row().add(self.debug_frame, sticky=tk.NSEW, columnspan=3).configure(weight=1)
             else:
@@ -276,15 +383,28 @@ class PatchExecutableFrame(tk.Frame):
 
             # ------------------------------------------------------------------------------------------
 
+            data_dir = config.get_data_dir()
             scrollbar_frame = ScrollbarFrame(
-                widget_factory=Text,
-                widget_args=dict(width=48, height=8, enabled=False),
+                widget_factory=LogView,
+                widget_args=dict(
+                    width=48,
+                    height=8,
+                    max_lines=self.config_section["log_max_lines"],
+                    log_path=data_dir / "patch.log" if data_dir else None,
+                ),
                 show_scrollbars=tk.VERTICAL,
             )
 
             grid.new_row().add(scrollbar_frame, sticky=tk.NSEW).column_span(3).configure(weight=1)
 
-            self.log_field: Text = scrollbar_frame.widget
+            self.log_field: LogView = scrollbar_frame.widget
+
+            self.entry_log_search = Entry()
+            self.entry_log_search.bind("<Return>", lambda _event: self.bt_find_in_log())
+            self.entry_log_search.bind("<Shift-Return>", lambda _event: self.bt_find_in_log(backwards=True))
+            button_find = ttk.Button(self, text="Find in log", command=self.bt_find_in_log)
+
+            grid.new_row().add(tk.Label(text="Search:"), sticky=tk.W).add(self.entry_log_search).add(button_find)
 
             grid.columnconfigure(1, weight=1)
 
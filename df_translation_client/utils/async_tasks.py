@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="df-translate")
+
+
+def create_task(coroutine: Coroutine[Any, Any, T]) -> asyncio.Task:
+    """
+    Schedule a coroutine in the event loop of async_tkinter_loop. The loop doesn't need to be running yet,
+    so it can be used in the constructors of the widgets.
+    """
+    return asyncio.get_event_loop_policy().get_event_loop().create_task(coroutine)
+
+
+async def run_in_executor(function: Callable[..., T], *args, pool: Optional[Executor] = None) -> T:
+    """Run a blocking function in a background thread without freezing the UI"""
+    return await asyncio.get_running_loop().run_in_executor(pool or executor, function, *args)
+
+
+async def run_in_thread(function: Callable[..., T], *args) -> T:
+    """
+    Run a long blocking function in a dedicated daemon thread, so it doesn't occupy a worker of the shared executor
+    and doesn't keep the application from exiting.
+    The function has to stop by itself when the awaiting task is cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def set_result(result: T, error: Optional[BaseException]):
+        if future.done():
+            return  # Cancelled
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def target():
+        result, error = None, None
+        try:
+            result = function(*args)
+        except BaseException as ex:
+            error = ex
+
+        try:
+            loop.call_soon_threadsafe(set_result, result, error)
+        except RuntimeError:
+            pass  # The event loop is closed
+
+    threading.Thread(target=target, name=f"df-translate-{function.__name__}", daemon=True).start()
+    return await future
+
+
+class SingleTask:
+    """Keeps only the latest started task: starting a new one cancels the previous (stale) one"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, coroutine: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        self.cancel()
+        self._task = create_task(coroutine)
+        return self._task
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
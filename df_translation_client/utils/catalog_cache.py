@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Generic, NamedTuple, Optional, Tuple, TypeVar, Union
+
+TCacheValue = TypeVar("TCacheValue")
+
+
+class _CacheItem(NamedTuple):
+    mtime_ns: int
+    size: int
+    value: object
+
+
+class CatalogCache(Generic[TCacheValue]):
+    """
+    Process-wide LRU cache of parsed translation files.
+
+    An item is valid while the (path, mtime_ns, size) of the file stays the same, otherwise the file is parsed again.
+    The memory cap is estimated by the total size of the cached files on disk.
+    """
+
+    def __init__(self, max_items: int = 64, max_size: int = 256 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_size = max_size
+        self._items: "OrderedDict[str, _CacheItem]" = OrderedDict()
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize_path(path: Union[str, Path]) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def lookup(self, path: Union[str, Path]) -> Tuple[Optional[TCacheValue], os.stat_result]:
+        """Get a cached value if it's still valid. The stat of the file is returned to be passed to put()."""
+        key = self._normalize_path(path)
+        stat = os.stat(key)
+
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item.mtime_ns == stat.st_mtime_ns and item.size == stat.st_size:
+                self._items.move_to_end(key)
+                return item.value, stat
+
+        return None, stat
+
+    def get(self, path: Union[str, Path], loader: Callable[[Path], TCacheValue]) -> TCacheValue:
+        value, stat = self.lookup(path)
+        if value is None:
+            value = loader(Path(path))
+            self.put(path, stat.st_mtime_ns, stat.st_size, value)
+        return value
+
+    def put(self, path: Union[str, Path], mtime_ns: int, size: int, value: TCacheValue):
+        key = self._normalize_path(path)
+
+        with self._lock:
+            self._discard(key)
+
+            if size > self.max_size:
+                return  # Too large to be cached at all
+
+            self._items[key] = _CacheItem(mtime_ns, size, value)
+            self._total_size += size
+
+            while len(self._items) > self.max_items or self._total_size > self.max_size:
+                _, item = self._items.popitem(last=False)
+                self._total_size -= item.size
+
+    def _discard(self, key: str):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._total_size -= item.size
+
+    def invalidate(self, path: Union[str, Path]):
+        with self._lock:
+            self._discard(self._normalize_path(path))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._total_size = 0
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        return self._normalize_path(path) in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def total_size(self) -> int:
+        return self._total_size
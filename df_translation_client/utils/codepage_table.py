@@ -0,0 +1,186 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+EncoderFunction = Callable[[str], Tuple[bytes, int]]
+
+TABLE_MAGIC = b"DFCP"
+TABLE_VERSION = 1
+BITSET_CODE_POINTS = 0x10000  # Only the Basic Multilingual Plane is stored in the table
+BITSET_SIZE = BITSET_CODE_POINTS // 8
+_HEADER = struct.Struct("<4sHI")  # magic, format version, length of the json part
+
+
+class CodepageTable:
+    """
+    Table of characters which can be encoded with one byte in each codepage.
+
+    For the Basic Multilingual Plane the table is a bitset per codepage, which is generated once on the first use
+    and stored in a memory-mapped file, so checking a catalog doesn't need any encoder at all.
+    Other characters are checked with the encoder and the results are memoized.
+    """
+
+    def __init__(self, get_encoder: Callable[[str], EncoderFunction], version: str = ""):
+        self._get_encoder = get_encoder
+        self.version = version
+        self.table_path: Optional[Path] = None
+        self._bitsets: Optional[Union[mmap.mmap, bytes]] = None
+        self._bitset_offsets: Dict[str, int] = dict()
+        self._encodable: Dict[str, Set[str]] = dict()
+        self._not_encodable: Dict[str, Set[str]] = dict()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    @staticmethod
+    def _is_encodable(encoder_function: EncoderFunction, char: str) -> bool:
+        try:
+            # Only one-byte encodings are supported (but shorter result is allowed)
+            return len(encoder_function(char)[0]) <= 1
+        except (UnicodeEncodeError, ValueError, LookupError):
+            return False
+
+    def load_table(self, table_path: Path):
+        """Set path of the table file. The file is read (or generated) on the first use."""
+        with self._lock:
+            self.table_path = table_path
+            self._bitsets = None
+            self._bitset_offsets = dict()
+
+    def _read_table(self, table_path: Path) -> Optional[Tuple[mmap.mmap, Dict[str, int]]]:
+        try:
+            with open(table_path, "rb") as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, table_version, json_size = _HEADER.unpack_from(data)
+            if magic != TABLE_MAGIC or table_version != TABLE_VERSION:
+                raise ValueError
+
+            start = _HEADER.size + json_size
+            header = json.loads(data[_HEADER.size : start].decode("utf-8"))
+            table_codepages = header["codepages"]
+
+            if header["version"] != self.version:
+                raise ValueError
+
+            if len(data) != start + len(table_codepages) * BITSET_SIZE:
+                raise ValueError
+        except (struct.error, ValueError, KeyError, TypeError):
+            data.close()
+            return None
+
+        return data, {codepage: start + i * BITSET_SIZE for i, codepage in enumerate(table_codepages)}
+
+    def _build_bitset(self, codepage: str) -> bytearray:
+        """Raises LookupError if the codepage is unknown"""
+        encoder_function = self._get_encoder(codepage)
+        bitset = bytearray(BITSET_SIZE)
+
+        for code in range(BITSET_CODE_POINTS):
+            if 0xD800 <= code <= 0xDFFF:
+                continue  # Surrogates cannot be encoded
+
+            if self._is_encodable(encoder_function, chr(code)):
+                bitset[code >> 3] |= 1 << (code & 7)
+
+        return bitset
+
+    def _write_table(self, codepages: List[str], bitsets: List[bytes]):
+        header = json.dumps(dict(version=self.version, codepages=codepages)).encode("utf-8")
+        data = bytearray(_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, len(header)) + header)
+        start = len(data)
+
+        for bitset in bitsets:
+            data += bitset
+
+        self._bitsets = bytes(data)
+        self._bitset_offsets = {codepage: start + i * BITSET_SIZE for i, codepage in enumerate(codepages)}
+
+        if self.table_path is not None:
+            temp_path = self.table_path.with_name(self.table_path.name + ".tmp")
+            try:
+                with open(temp_path, "wb") as file:
+                    file.write(data)
+                os.replace(temp_path, self.table_path)
+            except OSError:
+                pass  # Keep the table in memory only
+
+    def _has_codepages(self, codepages: List[str]) -> bool:
+        return self._bitsets is not None and all(codepage in self._bitset_offsets for codepage in codepages)
+
+    def _build_table(self, codepages: List[str]):
+        """
+        Add the missing codepages to the table. The bitsets are built without holding the lock,
+        so the callers which need only the existing codepages are not blocked.
+        """
+        with self._build_lock:  # Only one thread builds bitsets, the others wait for its result
+            with self._lock:
+                if self._bitsets is None and self.table_path is not None:
+                    table = self._read_table(self.table_path)
+                    if table is not None:
+                        self._bitsets, self._bitset_offsets = table
+
+                missing = [codepage for codepage in codepages if codepage not in self._bitset_offsets]
+                if self._bitsets is not None and not missing:
+                    return
+
+                table_codepages = list(self._bitset_offsets) + missing
+                bitsets = [
+                    bytes(self._bitsets[offset : offset + BITSET_SIZE]) for offset in self._bitset_offsets.values()
+                ]
+
+            bitsets += [self._build_bitset(codepage) for codepage in missing]
+
+            with self._lock:
+                if isinstance(self._bitsets, mmap.mmap):
+                    self._bitsets.close()  # The file can't be replaced while it's mapped (on Windows)
+
+                self._bitsets = None
+                self._write_table(table_codepages, bitsets)
+
+    def _check_character_with_encoder(self, codepage: str, char: str) -> bool:
+        encodable = self._encodable.setdefault(codepage, set())
+        not_encodable = self._not_encodable.setdefault(codepage, set())
+
+        if char in encodable:
+            return True
+        elif char in not_encodable:
+            return False
+
+        if self._is_encodable(self._get_encoder(codepage), char):
+            encodable.add(char)
+            return True
+        else:
+            not_encodable.add(char)
+            return False
+
+    def _check_characters(self, codepage: str, characters: Iterable[int]) -> bool:
+        bitsets = self._bitsets
+        offset = self._bitset_offsets[codepage]
+
+        for code in characters:
+            if code < BITSET_CODE_POINTS:
+                if not bitsets[offset + (code >> 3)] & (1 << (code & 7)):
+                    return False
+            elif not self._check_character_with_encoder(codepage, chr(code)):
+                return False
+
+        return True
+
+    def filter_codepages(self, codepages: Iterable[str], strings: Iterable[str]) -> List[str]:
+        """Raises LookupError if a codepage is unknown"""
+        codepages = list(codepages)
+        characters = set(map(ord, "".join(strings)))
+
+        while True:
+            with self._lock:
+                if self._has_codepages(codepages):
+                    return [codepage for codepage in codepages if self._check_characters(codepage, characters)]
+
+            self._build_table(codepages)
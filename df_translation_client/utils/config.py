@@ -1,6 +1,7 @@
 import json
 from collections import defaultdict
 from pathlib import Path
+from typing import Optional
 
 
 class ConfigSection(dict):
@@ -37,6 +38,12 @@ class Config:
         except (FileNotFoundError, ValueError):
             pass
 
+    def get_data_dir(self) -> Optional[Path]:
+        """Directory for additional data files (caches, indexes), it's the directory of the config file"""
+        if self.config_path is None:
+            return None
+        return Path(self.config_path).parent
+
     def init_section(self, section_name, defaults: dict = None) -> ConfigSection:
         if not defaults:
             defaults = dict()
@@ -0,0 +1,131 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+MANIFEST_FILE_NAME = ".df-translate-manifest.json"
+
+
+def new_hash():
+    """The same hash function as used by the index of translation files"""
+    return hashlib.sha256()
+
+
+def get_file_hash(path: Union[str, Path]) -> str:
+    file_hash = new_hash()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def copy_file(source: BinaryIO, target_file_name: Union[str, Path]) -> str:
+    """Copy the content of a file object into a new file, returns the hash of the content"""
+    file_hash = new_hash()
+    with open(target_file_name, "wb") as target:
+        for chunk in iter(lambda: source.read(io.DEFAULT_BUFFER_SIZE), b""):
+            file_hash.update(chunk)
+            target.write(chunk)
+    return file_hash.hexdigest()
+
+
+class FileManifest:
+    """
+    Content hashes of the downloaded files of a directory, stored in the same directory.
+
+    A hash is valid while the size and the mtime of the file stay the same.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.manifest_path = Path(directory) / MANIFEST_FILE_NAME
+        self._files: Dict[str, dict] = _read_manifest(self.manifest_path)
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def get_hash(self, file_name: Union[str, Path]) -> Optional[str]:
+        with self._lock:
+            return _get_valid_hash(self._files, file_name)
+
+    def set_hash(self, file_name: Union[str, Path], file_hash: str):
+        stat = os.stat(file_name)
+        with self._lock:
+            self._files[Path(file_name).name] = dict(hash=file_hash, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            self._dirty = True
+
+    def replace_file(self, part_file_name: Union[str, Path], file_name: Union[str, Path], file_hash: str) -> bool:
+        """
+        Atomically move a completely written temporary file to file_name, unless file_name has the same content.
+        In that case file_name is left untouched (with the same mtime), so the caches of it stay valid.
+        Returns False if the content is the same.
+        """
+        existing_hash = None
+        if os.path.exists(file_name) and os.path.getsize(file_name) == os.path.getsize(part_file_name):
+            existing_hash = self.get_hash(file_name) or get_file_hash(file_name)
+
+        if existing_hash == file_hash:
+            os.remove(part_file_name)
+            replaced = False
+        else:
+            os.replace(part_file_name, file_name)
+            replaced = True
+
+        self.set_hash(file_name, file_hash)
+        return replaced
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+
+            try:
+                with open(self.manifest_path, "w", encoding="utf-8") as manifest_file:
+                    json.dump(self._files, manifest_file, indent=1, sort_keys=True)
+            except OSError:
+                pass  # It's only an optimization
+            else:
+                self._dirty = False
+
+
+def _read_manifest(manifest_path: Path) -> Dict[str, dict]:
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            return dict(json.load(manifest_file))
+    except (FileNotFoundError, ValueError, TypeError):
+        return dict()
+
+
+def _get_valid_hash(files: Dict[str, dict], file_name: Union[str, Path]) -> Optional[str]:
+    entry = files.get(Path(file_name).name)
+    if entry is None:
+        return None
+
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return None
+
+    if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+        return None
+
+    return entry["hash"]
+
+
+_manifests_cache: Dict[Path, Tuple[int, Dict[str, dict]]] = dict()
+
+
+def get_manifest_hash(path: Union[str, Path]) -> Optional[str]:
+    """Get the content hash of a downloaded file from the manifest of its directory without reading the file"""
+    manifest_path = Path(path).parent / MANIFEST_FILE_NAME
+    try:
+        mtime_ns = os.stat(manifest_path).st_mtime_ns
+    except OSError:
+        return None
+
+    cached = _manifests_cache.get(manifest_path)
+    if cached is None or cached[0] != mtime_ns:
+        cached = _manifests_cache[manifest_path] = (mtime_ns, _read_manifest(manifest_path))
+
+    return _get_valid_hash(cached[1], path)
@@ -0,0 +1,268 @@
+import multiprocessing as mp
+import threading
+import time
+import traceback
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+from dfrus import dfrus
+
+from df_translation_client.utils.po_languages import (
+    CleanedDictionary,
+    cleanup_dictionary,
+    load_dictionary_raw,
+)
+from df_translation_client.utils.shared_dictionary import read_dictionary
+
+PROGRESS_STEP = 5000
+
+
+END_OF_JOB = b""  # Empty messages are never sent otherwise
+
+
+class ProcessMessageWrapper:
+    """
+    File-like object which sends the written text to another process in batches: the text is buffered
+    and sent as one UTF-8 message when the buffer is large enough, or when a line is finished
+    (but not more often than once per flush_interval seconds).
+    """
+
+    def __init__(self, connection: Connection, flush_size: int = 64 * 1024, flush_interval: float = 0.05):
+        self._connection = connection
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.encoding = "utf-8"
+        self._buffer: List[str] = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def write(self, s: str) -> int:
+        if not s:
+            return 0
+
+        with self._lock:
+            self._buffer.append(s)
+            self._size += len(s)
+            if self._size >= self.flush_size:
+                self._flush()
+            elif "\n" in s:
+                delay = self._last_flush + self.flush_interval - time.monotonic()
+                if delay <= 0:
+                    self._flush()
+                elif self._timer is None:
+                    # Don't keep a finished line in the buffer if nothing is written for a while
+                    self._timer = threading.Timer(delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        return len(s)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._buffer:
+            self._connection.send_bytes("".join(self._buffer).encode("utf-8", errors="replace"))
+            self._buffer.clear()
+            self._size = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+
+def receive_output(connection: Connection, max_size: int) -> Tuple[str, bool]:
+    """
+    Read the available output of a job without blocking, about max_size bytes at most.
+    Returns the text and whether the end of the job is reached.
+    """
+    chunks: List[bytes] = []
+    size = 0
+    finished = False
+    while size < max_size and connection.poll():
+        data = connection.recv_bytes()
+        if data == END_OF_JOB:
+            finished = True
+            break
+
+        chunks.append(data)
+        size += len(data)
+
+    return b"".join(chunks).decode("utf-8", errors="replace"), finished
+
+
+def run_job(messages: Connection, target: Callable[..., Any], kwargs: Mapping[str, Any]):
+    """Run a patching function with its output redirected to the connection"""
+    stdout = ProcessMessageWrapper(messages)
+    try:
+        target(stdout=stdout, stderr=stdout, **kwargs)
+    except Exception:
+        traceback.print_exc(file=stdout)
+    finally:
+        stdout.flush()
+        messages.send_bytes(END_OF_JOB)
+
+
+def run_patch(dictionary_path: str, **kwargs):
+    """
+    Entry point of the patching process: the translation table is read from a file written by write_dictionary(),
+    instead of being pickled together with the arguments of the process.
+    """
+    dfrus.run(trans_table=read_dictionary(dictionary_path), **kwargs)
+
+
+def _report_progress(pairs: Iterable[Tuple[str, str]], stdout: TextIO) -> Iterator[Tuple[str, str]]:
+    count = 0
+    for count, pair in enumerate(pairs, 1):
+        if count % PROGRESS_STEP == 0:
+            print(f"{count} strings read...", file=stdout)
+        yield pair
+
+
+_cleaned_dictionary: Optional[CleanedDictionary] = None  # Kept between the jobs of the persistent worker on request
+
+
+def load_translation(
+    translation_file: Path,
+    exclusions_by_language: Mapping[str, Iterable[str]],
+    stdout: TextIO,
+    keep: bool = False,
+) -> Dict[str, str]:
+    """
+    Load and clean up the translation.
+
+    With keep, the cleaned dictionary is kept in the process while the file is unchanged,
+    so the next patch only recomputes the entries affected by changed exclusions.
+    Otherwise nothing of the translation is left in the process after the patch.
+    """
+    global _cleaned_dictionary
+
+    if not keep:
+        _cleaned_dictionary = None
+        print(f"Loading {translation_file.name}...", file=stdout)
+        entries, language = load_dictionary_raw(translation_file)
+        exclusions = exclusions_by_language.get(language, None)
+        dictionary = dict(cleanup_dictionary(_report_progress(entries, stdout), exclusions, exclusions))
+    elif _cleaned_dictionary is not None and _cleaned_dictionary.is_actual(translation_file):
+        print(f"Using already loaded {translation_file.name}", file=stdout)
+        _cleaned_dictionary.update_exclusions(exclusions_by_language)
+        dictionary = _cleaned_dictionary.to_dict()
+    else:
+        print(f"Loading {translation_file.name}...", file=stdout)
+        _cleaned_dictionary = None  # Free the memory before loading a new file
+        _cleaned_dictionary = CleanedDictionary(
+            translation_file, exclusions_by_language, lambda entries: _report_progress(entries, stdout)
+        )
+        dictionary = _cleaned_dictionary.to_dict()
+
+    print(f"{len(dictionary)} strings loaded", file=stdout)
+    return dictionary
+
+
+def run_patch_with_translation_file(
+    translation_file: str,
+    exclusions_by_language: Mapping[str, Iterable[str]],
+    keep_translation: bool = False,
+    **kwargs,
+):
+    """
+    Entry point of the patching process which loads and cleans up the translation itself,
+    so the GUI process doesn't need to build the translation table at all.
+    keep_translation keeps the loaded translation in the (persistent) process for the next patches.
+    """
+    trans_table = load_translation(Path(translation_file), exclusions_by_language, kwargs["stdout"], keep_translation)
+    dfrus.run(trans_table=trans_table, **kwargs)
+
+
+def worker_main(jobs: Connection, messages: Connection):
+    """
+    Main loop of the persistent patching process: runs (target, kwargs) jobs one by one.
+    The output of the jobs is sent with ProcessMessageWrapper, the end of a job is marked with END_OF_JOB.
+    """
+    while True:
+        try:
+            job = jobs.recv()
+        except EOFError:
+            break
+
+        if job is None:
+            break
+
+        target, kwargs = job
+        run_job(messages, target, kwargs)
+
+
+class PatchWorker:
+    """
+    Pre-started patching process which accepts jobs over a pipe, so the modules of dfrus (and of the app itself)
+    are already imported when a patch is started. The process is recreated after a crash or when it's stopped.
+    """
+
+    def __init__(self):
+        self.process: Optional[mp.Process] = None
+        self._jobs: Optional[Connection] = None
+        self._messages: Optional[Connection] = None
+        self.busy = False
+        self._outdated = False
+
+    def start(self):
+        jobs_receiver, self._jobs = mp.Pipe(duplex=False)
+        self._messages, messages_sender = mp.Pipe(duplex=False)
+        self.process = mp.Process(target=worker_main, args=(jobs_receiver, messages_sender), daemon=True)
+        self.process.start()
+        jobs_receiver.close()
+        messages_sender.close()
+        self.busy = False
+        self._outdated = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def submit(self, target: Callable[..., Any], **kwargs) -> Connection:
+        """Start a job, returns the connection to receive its output from"""
+        if not self.alive or self.busy:
+            self.restart()
+
+        self._jobs.send((target, kwargs))
+        self.busy = True
+        return self._messages
+
+    def job_finished(self, crashed: bool = False):
+        """Mark the current job as finished. If the process crashed (or the pipe broke), it's replaced."""
+        self.busy = False
+        if crashed or self._outdated or not self.alive:
+            self.restart()  # Prepare a new process for the next job
+
+    def recycle(self):
+        """Replace the process with a fresh one (e.g. after reloading dfrus), but don't interrupt a running job"""
+        if self.busy:
+            self._outdated = True
+        else:
+            self.restart()
+
+    def stop(self):
+        if self.process is not None:
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def restart(self):
+        self.stop()
+        self.start()
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from df_translation_client.utils.file_manifest import get_file_hash, get_manifest_hash
+
+INDEX_VERSION = 1
+
+
+class PoFileInfo(NamedTuple):
+    language: Optional[str]
+    entries: Optional[int]
+    hash: Optional[str]
+    codepages: Optional[List[str]]
+
+
+def get_content_hash(path: str) -> str:
+    """Take the hash from the manifest of the downloaded files if possible, otherwise read the whole file"""
+    return get_manifest_hash(path) or get_file_hash(path)
+
+
+class PoIndex:
+    """
+    Persistent index of translation files' metadata (language, entry count, content hash, suitable codepages).
+
+    An entry is valid while the mtime and the size of the file stay the same. If they changed, but the content hash
+    is the same, the entry is revalidated without parsing the file.
+    """
+
+    def __init__(self, index_path: Optional[Path] = None):
+        self.index_path = index_path
+        self._files: Dict[str, dict] = dict()
+        self._supported_codepages: Optional[List[str]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load_index(self, index_path: Optional[Path] = None):
+        if index_path is None:
+            index_path = self.index_path
+        else:
+            self.index_path = index_path
+
+        try:
+            with open(index_path, encoding="utf-8") as index_file:
+                data = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            return
+
+        if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+            with self._lock:
+                self._files = dict(data.get("files", dict()))
+                self._supported_codepages = data.get("supported_codepages")
+                self._dirty = False
+
+    def save_index(self):
+        if self.index_path is None:
+            return
+
+        self._prune()
+        if not self._dirty:
+            return
+
+        with self._lock:
+            data = dict(version=INDEX_VERSION, supported_codepages=self._supported_codepages, files=self._files)
+            self._dirty = False
+
+            try:
+                with open(self.index_path, "w", encoding="utf-8") as index_file:
+                    json.dump(data, index_file, indent=1, sort_keys=True)
+            except OSError:
+                pass  # The index is only an optimization, it's not a problem if it cannot be saved
+
+    def _prune(self):
+        """Drop the entries of deleted files, so the index doesn't grow forever"""
+        with self._lock:
+            keys = list(self._files)
+
+        missing = [key for key in keys if not os.path.exists(key)]
+        if missing:
+            with self._lock:
+                for key in missing:
+                    self._files.pop(key, None)
+                self._dirty = True
+
+    @staticmethod
+    def _normalize_path(path: Union[str, Path]) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def get(self, path: Union[str, Path]) -> Optional[PoFileInfo]:
+        key = self._normalize_path(path)
+        stat = os.stat(key)
+
+        with self._lock:
+            entry = self._files.get(key)
+
+        if entry is None:
+            return None
+
+        if entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            if entry.get("hash") is None or entry["size"] != stat.st_size or get_content_hash(key) != entry["hash"]:
+                self.invalidate(key)
+                return None
+
+            # The file is touched, but its content is the same
+            with self._lock:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                self._dirty = True
+
+        return PoFileInfo(entry.get("language"), entry.get("entries"), entry.get("hash"), entry.get("codepages"))
+
+    def add(
+        self,
+        path: Union[str, Path],
+        language: Optional[str],
+        entries: Optional[int] = None,
+        file_hash: Optional[str] = None,
+        stat: Optional[os.stat_result] = None,
+    ) -> PoFileInfo:
+        """
+        Store the metadata of a file. stat should be taken before the file was read: if the file has changed since then,
+        the metadata is outdated and isn't stored.
+        """
+        key = self._normalize_path(path)
+        if stat is None:
+            stat = os.stat(key)
+
+        if file_hash is None and entries is not None:
+            file_hash = get_content_hash(key)
+
+        current_stat = os.stat(key)
+        if current_stat.st_mtime_ns != stat.st_mtime_ns or current_stat.st_size != stat.st_size:
+            self.invalidate(key)  # Also drop an older entry, so set_codepages() doesn't update it
+            return PoFileInfo(language, entries, None, None)
+
+        with self._lock:
+            self._files[key] = dict(
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                language=language,
+                entries=entries,
+                hash=file_hash,
+                codepages=None,
+            )
+            self._dirty = True
+
+        return PoFileInfo(language, entries, file_hash, None)
+
+    def set_codepages(self, path: Union[str, Path], codepages: List[str]):
+        key = self._normalize_path(path)
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None:
+                entry["codepages"] = list(codepages)
+                self._dirty = True
+
+    def check_supported_codepages(self, supported_codepages: List[str]):
+        """Drop the stored codepages if the list of the supported codepages has changed"""
+        supported_codepages = list(supported_codepages)
+        with self._lock:
+            if self._supported_codepages != supported_codepages:
+                for entry in self._files.values():
+                    entry["codepages"] = None
+                self._supported_codepages = supported_codepages
+                self._dirty = True
+
+    def invalidate(self, path: Union[str, Path]):
+        with self._lock:
+            if self._files.pop(self._normalize_path(path), None) is not None:
+                self._dirty = True
+
+    def __len__(self):
+        return len(self._files)
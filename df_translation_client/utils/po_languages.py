@@ -1,11 +1,69 @@
+import importlib
+import os
+import sys
+import threading
 import traceback
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from importlib import metadata
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, List, Mapping, Optional, Set, TextIO, Tuple
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from babel.messages.pofile import Catalog, read_po
-from df_gettext_toolkit.utils.fix_translated_strings import cleanup_string, fix_spaces
+from df_gettext_toolkit.utils import fix_translated_strings
 from dfrus.patch_charmap import get_encoder, get_supported_codepages
 
+from df_translation_client.utils.async_tasks import run_in_executor
+from df_translation_client.utils.catalog_cache import CatalogCache
+from df_translation_client.utils.codepage_table import CodepageTable
+from df_translation_client.utils.po_index import PoFileInfo, PoIndex
+from df_translation_client.utils.po_reader import (
+    get_header_language,
+    iter_messages,
+    read_header,
+)
+
+
+class PoFileData(NamedTuple):
+    """Compact result of parsing of a PO file"""
+
+    language: Optional[str]
+    entries: List[Tuple[str, str]]  # (id, string) pairs in the order of babel's Catalog, including the header
+
+    @property
+    def message_count(self) -> int:
+        return len(self.entries) - 1  # Don't count the header entry
+
+
+catalog_cache: CatalogCache[PoFileData] = CatalogCache()
+po_index = PoIndex()
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_dfrus_version() -> str:
+    try:
+        return metadata.version("dfrus")
+    except metadata.PackageNotFoundError:
+        return ""
+
+
+codepage_table = CodepageTable(get_encoder, version=_get_dfrus_version())
+
 
 def get_language(catalog: Catalog) -> Optional[str]:
     for key, value in catalog.mime_headers:
@@ -15,92 +73,332 @@ def get_language(catalog: Catalog) -> Optional[str]:
         return None
 
 
+def _read_po_data(path: Path) -> PoFileData:
+    with open(path, encoding="utf-8") as file:
+        catalog = read_po(file)
+    return PoFileData(get_language(catalog), [(entry.id, entry.string) for entry in catalog])
+
+
+def _load_po_data_with_stat(path: Path) -> Tuple[PoFileData, os.stat_result]:
+    """Returns the data with the stat of the file taken before parsing"""
+    data, stat = catalog_cache.lookup(path)
+    if data is None:
+        data = _read_po_data(path)
+        catalog_cache.put(path, stat.st_mtime_ns, stat.st_size, data)
+    return data, stat
+
+
+def load_po_data(path: Path) -> PoFileData:
+    return _load_po_data_with_stat(path)[0]
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:  # load_po_files() can be called from several threads of the executor
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor()
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor):
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:  # It could already be replaced by another thread
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_process_pool():
+    """Stop the worker processes of load_po_files(), a new pool is created on the next call"""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        if sys.version_info >= (3, 9):
+            pool.shutdown(cancel_futures=True)
+        else:
+            pool.shutdown()
+
+
+def _load_po_files_with_stats(paths: Iterable[Path]) -> List[Tuple[PoFileData, os.stat_result]]:
+    paths = list(paths)
+    results = dict()
+    missing = []
+    for path in paths:
+        data, stat = catalog_cache.lookup(path)
+        if data is None:
+            missing.append((path, stat))
+        else:
+            results[path] = data, stat
+
+    if len(missing) == 1:
+        path, _ = missing[0]
+        results[path] = _load_po_data_with_stat(path)
+    elif missing:
+        missing_paths = [path for path, _ in missing]
+        pool = _get_process_pool()
+        try:
+            loaded = list(pool.map(_read_po_data, missing_paths))
+        except BrokenProcessPool:
+            _discard_process_pool(pool)
+            loaded = [_read_po_data(path) for path in missing_paths]
+
+        for (path, stat), data in zip(missing, loaded):
+            catalog_cache.put(path, stat.st_mtime_ns, stat.st_size, data)
+            results[path] = data, stat
+
+    return [results[path] for path in paths]
+
+
+def load_po_files(paths: Iterable[Path]) -> List[PoFileData]:
+    """
+    Load many PO files at once. The files which are not in the cache are parsed concurrently in a process pool,
+    because babel's read_po is pure-python and CPU-bound.
+    """
+    return [data for data, _ in _load_po_files_with_stats(paths)]
+
+
+def read_language(path: Path) -> Optional[str]:
+    with open(path, encoding="utf-8") as file:
+        headers = read_header(file)
+
+    if headers is None:
+        # The header is malformed, fall back to the full parser
+        return load_po_data(path).language
+
+    return get_header_language(headers)
+
+
+def get_file_info(path: Path) -> PoFileInfo:
+    info = po_index.get(path)
+    if info is None:
+        stat = os.stat(path)
+        info = po_index.add(path, language=read_language(path), stat=stat)
+    return info
+
+
 def get_languages(directory: Path):
     languages = set()
     for filename in directory.glob("*.po"):
         try:
-            with open(directory / filename, encoding="utf-8") as file:
-                catalog = read_po(file)
-                languages.add(get_language(catalog))
+            languages.add(get_file_info(directory / filename).language)
         except Exception as ex:
             traceback.print_exception(ex)
 
+    po_index.save_index()
     return sorted(languages)
 
 
 def filter_files_by_language(directory: Path, language):
     for filename in directory.glob("*.po"):
-        with open(filename, encoding="utf-8") as file:
-            try:
-                catalog = read_po(file)
-                if get_language(catalog) == language:
-                    yield filename.name
-            except Exception as ex:
-                traceback.print_exception(ex)
+        try:
+            if get_file_info(filename).language == language:
+                yield filename.name
+        except Exception as ex:
+            traceback.print_exception(ex)
 
+    po_index.save_index()
 
-def filter_codepages(encodings: Iterable[str], strings: List[str]):  # FIXME: make async
-    for encoding in encodings:
-        encoder_function = get_encoder(encoding)
 
-        try:
-            for text in strings:
-                encoded_text = encoder_function(text)[0]
-                # Only one-byte encodings are supported (but shorter result is allowed)
-                if len(encoded_text) > len(text):
-                    raise ValueError
-            yield encoding
-        except (UnicodeEncodeError, ValueError, LookupError):
-            pass  # These exceptions mean that the chosen encoding is not suitable for the file
-
-
-def get_suitable_codepages_for_directory(directory: Path, language: str):  # FIXME: make async
-    files = filter_files_by_language(directory, language)
-    codepages = get_supported_codepages().keys()
-
-    for file in files:
-        with open(directory / file, "r", encoding="utf-8") as fn:
-            catalog = read_po(fn)
-            strings = [cleanup_string(entry.string) for entry in catalog]
-        codepages = filter_codepages(codepages, strings)
+def filter_codepages(encodings: Iterable[str], strings: List[str]) -> List[str]:
+    return codepage_table.filter_codepages(encodings, strings)
 
+
+def _get_codepages(translation_file: Path, data: PoFileData, stat: os.stat_result) -> List[str]:
+    """stat is the stat of the file taken before it was parsed"""
+    strings = [fix_translated_strings.cleanup_string(string) for _, string in data.entries]
+    codepages = filter_codepages(get_supported_codepages().keys(), strings)
+    po_index.add(translation_file, language=data.language, entries=data.message_count, stat=stat)
+    po_index.set_codepages(translation_file, codepages)
     return codepages
 
 
-def get_suitable_codepages_for_file(translation_file: Path):  # FIXME: make async
-    codepages = get_supported_codepages().keys()
+def _get_file_codepages(translation_file: Path) -> List[str]:
+    info = get_file_info(translation_file)
+    if info.codepages is not None:
+        return info.codepages
+
+    return _get_codepages(translation_file, *_load_po_data_with_stat(translation_file))
 
-    with open(translation_file, "r", encoding="utf-8") as fn:
-        catalog = read_po(fn)
-        translation_file_language = get_language(catalog)
-        strings = [cleanup_string(entry.string) for entry in catalog]
 
-    return filter_codepages(codepages, strings), translation_file_language
+def get_suitable_codepages_for_directory(directory: Path, language: str):
+    files = [directory / file for file in filter_files_by_language(directory, language)]
+    codepages = list(get_supported_codepages().keys())
+    po_index.check_supported_codepages(codepages)
+
+    codepages_by_file = {file: get_file_info(file).codepages for file in files}
+    not_indexed = [file for file, file_codepages in codepages_by_file.items() if file_codepages is None]
+    for file, (data, stat) in zip(not_indexed, _load_po_files_with_stats(not_indexed)):
+        codepages_by_file[file] = _get_codepages(file, data, stat)
+
+    for file_codepages in codepages_by_file.values():
+        file_codepages = set(file_codepages)
+        codepages = [codepage for codepage in codepages if codepage in file_codepages]
+
+    po_index.save_index()
+    return codepages
+
+
+def get_suitable_codepages_for_file(translation_file: Path):
+    po_index.check_supported_codepages(get_supported_codepages().keys())
+    codepages = _get_file_codepages(translation_file)
+    translation_file_language = get_file_info(translation_file).language
+    po_index.save_index()
+    return codepages, translation_file_language
+
+
+@lru_cache(maxsize=64 * 1024)
+def _cleanup_translations_string_cached(
+    original: str, translation: str, excluded_leading: bool, excluded_trailing: bool
+) -> str:
+    return fix_translated_strings.fix_spaces(
+        original,
+        fix_translated_strings.cleanup_string(translation),
+        {original} if excluded_leading else None,
+        {original} if excluded_trailing else None,
+    )
+
+
+def reload_cleanup_functions():
+    """Reload the string cleanup functions of df_gettext_toolkit, dropping the results memoized with the old ones"""
+    importlib.reload(fix_translated_strings)
+    _cleanup_translations_string_cached.cache_clear()
 
 
 def cleanup_translations_string(
     original: str, translation: str, exclusions_leading: Optional[Set[str]], exclusions_trailing: Optional[Set[str]]
 ) -> str:
-    return fix_spaces(original, cleanup_string(translation), exclusions_leading, exclusions_trailing)
+    # fix_spaces only checks whether the original string is in the exclusions, so the result is memoized by that fact
+    # instead of the whole exclusion sets: changing an exclusion invalidates only the results of the affected string
+    return _cleanup_translations_string_cached(
+        original,
+        translation,
+        bool(exclusions_leading) and original in exclusions_leading,
+        bool(exclusions_trailing) and original in exclusions_trailing,
+    )
 
 
-def cleanup_dictionary(  # FIXME: make async
+def cleanup_dictionary(
     raw_dict: Iterable[Tuple[str, str]], exclusions_leading: Optional[Set[str]], exclusions_trailing: Optional[Set[str]]
 ) -> Iterable[Tuple[str, str]]:
+    # Exclusions may come from the config as lists
+    exclusions_leading = None if exclusions_leading is None else set(exclusions_leading)
+    exclusions_trailing = None if exclusions_trailing is None else set(exclusions_trailing)
+
     return {
         (original, cleanup_translations_string(original, translation, exclusions_leading, exclusions_trailing))
         for original, translation in raw_dict
     }
 
 
-def load_dictionary_raw(translation_file: TextIO) -> Tuple[Iterable[Tuple[str, str]], str]:  # FIXME: make async
-    catalog = read_po(translation_file)
-    language = get_language(catalog)
-    dictionary = ((entry.id, entry.string) for entry in catalog)
-    return dictionary, language
+class CleanedDictionary:
+    """
+    Cleaned translation dictionary of a file kept in memory.
+    When only the exclusions change, just the entries of the added or removed exclusions are recomputed.
+    """
+
+    def __init__(
+        self,
+        translation_file: Path,
+        exclusions_by_language: Mapping[str, Iterable[str]],
+        wrap_entries: Optional[Callable[[Iterable[Tuple[str, str]]], Iterable[Tuple[str, str]]]] = None,
+    ):
+        """wrap_entries is applied to the raw entries while they are read, e.g. to report the progress"""
+        self.translation_file = translation_file
+        self._stamp = self._get_stamp(translation_file)
+
+        dictionary, self.language = load_dictionary_raw(translation_file)
+        self._raw = list(wrap_entries(dictionary) if wrap_entries else dictionary)
+        self._exclusions = self._get_exclusions(exclusions_by_language)
+        self._cleaned = [
+            (original, cleanup_translations_string(original, translation, self._exclusions, self._exclusions))
+            for original, translation in self._raw
+        ]
+
+        # Exclusions can affect only the strings with leading or trailing spaces
+        self._indexes_by_original: Dict[str, List[int]] = defaultdict(list)
+        for i, (original, _) in enumerate(self._raw):
+            if isinstance(original, str) and original and (original[0].isspace() or original[-1].isspace()):
+                self._indexes_by_original[original].append(i)
+
+    @staticmethod
+    def _get_stamp(translation_file: Path) -> Tuple[int, int]:
+        stat = translation_file.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _get_exclusions(self, exclusions_by_language: Mapping[str, Iterable[str]]) -> Set[str]:
+        return set(exclusions_by_language.get(self.language, None) or ())
+
+    def is_actual(self, translation_file: Path) -> bool:
+        return translation_file == self.translation_file and self._get_stamp(translation_file) == self._stamp
+
+    def update_exclusions(self, exclusions_by_language: Mapping[str, Iterable[str]]):
+        exclusions = self._get_exclusions(exclusions_by_language)
+
+        for original in exclusions ^ self._exclusions:
+            for i in self._indexes_by_original.get(original, ()):
+                translation = self._raw[i][1]
+                self._cleaned[i] = (
+                    original,
+                    cleanup_translations_string(original, translation, exclusions, exclusions),
+                )
+
+        self._exclusions = exclusions
 
+    @property
+    def items(self) -> Set[Tuple[str, str]]:
+        return set(self._cleaned)
 
-def load_dictionary_with_cleanup(translation_file: TextIO, exclusions_by_language: Mapping[str, Set[str]]):
+    def to_dict(self) -> Dict[str, str]:
+        """The translation table, without building the set of the items first"""
+        return dict(self._cleaned)
+
+
+def _iter_dictionary(translation_file: Path) -> Iterator[Tuple[str, str]]:
+    with open(translation_file, encoding="utf-8") as file:
+        yield from islice(iter_messages(file), 1, None)  # Skip the header entry
+
+
+def load_dictionary_raw(translation_file: Path) -> Tuple[Iterable[Tuple[str, str]], str]:
+    data, _ = catalog_cache.lookup(translation_file)
+    if data is not None:
+        return islice(data.entries, 1, None), data.language  # Skip the header entry
+
+    # The file isn't loaded yet, so read it incrementally without keeping the whole catalog in memory
+    return _iter_dictionary(translation_file), read_language(translation_file)
+
+
+def load_dictionary_with_cleanup(translation_file: Path, exclusions_by_language: Mapping[str, Set[str]]):
     dictionary, language = load_dictionary_raw(translation_file)
     exclusions = exclusions_by_language.get(language, None)
     return cleanup_dictionary(dictionary, exclusions, exclusions)
+
+
+async def async_get_languages(directory: Path) -> List[str]:
+    return await run_in_executor(get_languages, directory)
+
+
+async def async_filter_files_by_language(directory: Path, language: str) -> List[str]:
+    return await run_in_executor(lambda: sorted(filter_files_by_language(directory, language)))
+
+
+async def async_get_suitable_codepages_for_directory(directory: Path, language: str) -> List[str]:
+    return await run_in_executor(get_suitable_codepages_for_directory, directory, language)
+
+
+async def async_get_suitable_codepages_for_file(translation_file: Path) -> Tuple[List[str], Optional[str]]:
+    return await run_in_executor(get_suitable_codepages_for_file, translation_file)
+
+
+async def async_load_dictionary_raw(translation_file: Path) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+    def load():
+        dictionary, language = load_dictionary_raw(translation_file)
+        return list(dictionary), language
+
+    return await run_in_executor(load)
+
+
+async def async_load_dictionary_with_cleanup(
+    translation_file: Path, exclusions_by_language: Mapping[str, Set[str]]
+) -> Iterable[Tuple[str, str]]:
+    return await run_in_executor(load_dictionary_with_cleanup, translation_file, exclusions_by_language)
@@ -0,0 +1,224 @@
+import re
+from email import message_from_string
+from typing import Iterator, List, Optional, Set, TextIO, Tuple, Union
+
+from babel.core import UnknownLocaleError
+from babel.messages.plurals import get_plural
+from babel.messages.pofile import unescape
+
+MessageId = Union[str, Tuple[str, ...]]
+MessageString = Union[str, Tuple[str, ...]]
+
+
+def _parse_string(text: str) -> Optional[str]:
+    text = text.strip()
+    if len(text) < 2 or not (text.startswith('"') and text.endswith('"')):
+        return None
+    return unescape(text)
+
+
+def read_header(file: TextIO) -> Optional[List[Tuple[str, str]]]:
+    """
+    Read the header (the first msgid "" entry) of a PO file without parsing the rest of the file.
+    Returns None if the file doesn't start with a well-formed header entry.
+    """
+    msgid: Optional[List[str]] = None
+    msgstr: Optional[List[str]] = None
+    current: Optional[List[str]] = None
+
+    for line in file:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            if msgstr is not None:
+                break  # The header entry is finished
+            continue
+
+        if line.startswith('"'):
+            if current is None:
+                return None
+            text = _parse_string(line)
+        else:
+            keyword, _, rest = line.partition(" ")
+            text = _parse_string(rest)
+
+            if keyword == "msgid" and msgid is None:
+                current = msgid = []
+            elif keyword == "msgstr" and msgid is not None and msgstr is None:
+                current = msgstr = []
+            elif msgstr is not None:
+                break  # The next entry is started
+            else:
+                return None
+
+        if text is None:
+            return None
+
+        current.append(text)
+
+    if msgid is None or msgstr is None or "".join(msgid) != "":
+        return None
+
+    return message_from_string("".join(msgstr)).items()
+
+
+def get_header_language(headers: List[Tuple[str, str]]) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == "language":
+            # Normalize the value the same way as babel does
+            return value.replace("-", "_") or None
+    else:
+        return None
+
+
+def _get_num_plurals(headers: List[Tuple[str, str]]) -> int:
+    """Get the number of plural forms the same way as babel's Catalog does"""
+    for key, value in headers:
+        if key.lower() == "plural-forms":
+            match = re.search(r"nplurals\s*=\s*(\d+)", value)
+            return int(match.group(1)) if match else 2
+
+    language = get_header_language(headers)
+    if language:
+        try:
+            return get_plural(language).num_plurals
+        except (UnknownLocaleError, ValueError):
+            pass
+
+    return 2
+
+
+class _MessageParser:
+    """
+    Streaming counterpart of babel's PoFileParser: yields (msgid, msgstr) pairs as soon as an entry is finished,
+    without building a Catalog.
+    """
+
+    _keyword_pattern = re.compile(r"^(msgid_plural|msgid|msgstr|msgctxt)(\[\d+\])?\s+(.*)$")
+
+    def __init__(self):
+        self.num_plurals = 2
+        self.header_found = False
+        self.header_yielded = False
+        self._seen_keys: Set[Tuple[Optional[str], str]] = set()
+        self._finished: List[Tuple[MessageId, MessageString]] = []
+        self._reset()
+
+    def _reset(self):
+        self.messages: List[List[str]] = []
+        self.translations: List[Tuple[int, List[str]]] = []
+        self.context: Optional[List[str]] = None
+        self.current: Optional[List[str]] = None
+        self.obsolete = False
+
+    def _add_header(self, string: str):
+        # babel's Catalog always starts with the header entry, even if the file has none
+        self.header_yielded = True
+        self._finished.append(("", string))
+
+    def _finish(self):
+        if not self.messages:
+            # Nothing to finish, e.g. the msgid after a msgctxt line: keep the context, drop stray msgstr lines
+            self.translations = []
+            return
+
+        if not self.translations or self.obsolete:
+            self._reset()
+            return
+
+        if len(self.messages) > 1:
+            msgid = tuple("".join(parts) for parts in self.messages)
+            string = [""] * self.num_plurals
+            for index, parts in sorted(self.translations):
+                if index < self.num_plurals:
+                    string[index] = "".join(parts)
+            string = tuple(string)
+        else:
+            msgid = "".join(self.messages[0])
+            string = "".join(sorted(self.translations)[0][1])
+
+        context = None if self.context is None else "".join(self.context)
+        self._reset()
+
+        if msgid == "" and context is None:
+            if not self.header_found:
+                self.header_found = True
+                self.num_plurals = _get_num_plurals(message_from_string(string).items())
+
+            if not self.header_yielded:
+                self._add_header(string)
+            # Otherwise babel merges a repeated header into the first one
+            return
+
+        # The same key as in babel's Catalog: a repeated entry is merged into the first one, keeping its string
+        key = (context, msgid[0] if isinstance(msgid, tuple) else msgid)
+        if key in self._seen_keys:
+            return
+        self._seen_keys.add(key)
+
+        if not self.header_yielded:
+            self._add_header("")
+        self._finished.append((msgid, string))
+
+    def _process_keyword_line(self, line: str, obsolete: bool):
+        match = self._keyword_pattern.match(line)
+        if not match:
+            return  # Skip malformed lines like babel does
+
+        keyword, index, text = match.groups()
+        text = _parse_string(text)
+        if text is None:
+            return
+
+        if keyword in ("msgid", "msgctxt"):
+            self._finish()
+
+        self.obsolete = obsolete
+
+        if keyword in ("msgid", "msgid_plural"):
+            self.current = [text]
+            self.messages.append(self.current)
+        elif keyword == "msgstr":
+            self.current = [text]
+            self.translations.append((int(index[1:-1]) if index else 0, self.current))
+        else:
+            self.current = self.context = [text]
+
+    def parse(self, file: TextIO) -> Iterator[Tuple[MessageId, MessageString]]:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith("#~"):
+                self._process_keyword_line(line[2:].lstrip(), obsolete=True)
+            elif line.startswith("#"):
+                self._finish()
+            elif line.startswith('"'):
+                if self.current is not None:
+                    text = _parse_string(line)
+                    if text is not None:
+                        self.current.append(text)
+            else:
+                self._process_keyword_line(line, obsolete=False)
+
+            if self._finished:
+                yield from self._finished
+                self._finished.clear()
+
+        self._finish()
+        if not self.header_yielded:
+            self._add_header("")
+        yield from self._finished
+
+
+def iter_messages(file: TextIO) -> Iterator[Tuple[MessageId, MessageString]]:
+    """
+    Read (msgid, msgstr) pairs from a PO file incrementally, without building a Catalog.
+    Only the keys of the read entries are kept, to skip duplicates.
+
+    Multi-line strings, contexts and plural forms are handled the same way as babel's read_po does.
+    Like in babel's Catalog, the first pair is always the header entry, but its string is yielded as is
+    (babel regenerates it), or empty if the file has no header.
+    Only the first one of duplicated entries is yielded, obsolete entries are skipped.
+    """
+    return _MessageParser().parse(file)
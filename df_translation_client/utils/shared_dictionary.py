@@ -0,0 +1,59 @@
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from itertools import accumulate, chain
+from pathlib import Path
+from typing import Dict, Mapping, Union
+
+_MAGIC = b"DFTD"
+_HEADER = struct.Struct("<4sII")  # magic, number of items, size of the text in bytes
+_OFFSET_TYPECODE = "I"
+
+
+def write_dictionary(dictionary: Mapping[str, str], path: Union[str, Path]):
+    """
+    Serialize a translation table into a compact block: all the strings are joined into one text,
+    which is preceded by an array of the string offsets.
+    Entries with plural forms (tuples of strings instead of strings) are skipped.
+    """
+    items = [
+        (original, translation)
+        for original, translation in dictionary.items()
+        if isinstance(original, str) and isinstance(translation, str)
+    ]
+    strings = list(chain.from_iterable(items))
+    offsets = array(_OFFSET_TYPECODE, accumulate(map(len, strings), initial=0))
+    text = "".join(strings).encode("utf-8")
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(_MAGIC, len(items), len(text)))
+        file.write(offsets.tobytes())
+        file.write(text)
+
+
+def read_dictionary(path: Union[str, Path]) -> Dict[str, str]:
+    """Read a translation table written by write_dictionary() through a memory map, without unpickling"""
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as block:
+        magic, count, text_size = _HEADER.unpack_from(block)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a dictionary file")
+
+        offsets = array(_OFFSET_TYPECODE)
+        offsets_start = _HEADER.size
+        text_start = offsets_start + offsets.itemsize * (count * 2 + 1)
+        offsets.frombytes(block[offsets_start:text_start])
+        text = str(block[text_start : text_start + text_size], "utf-8")
+
+    bounds = offsets.tolist()
+    strings = iter([text[start:end] for start, end in zip(bounds, bounds[1:])])
+    return dict(zip(strings, strings))
+
+
+def write_temporary_dictionary(dictionary: Mapping[str, str]) -> Path:
+    """Write a translation table into a temporary file to be passed to another process. Remove it after use."""
+    handle, path = tempfile.mkstemp(prefix="df-translate-", suffix=".dict")
+    os.close(handle)
+    write_dictionary(dictionary, path)
+    return Path(path)
@@ -1,6 +1,7 @@
 import tkinter as tk
+from pathlib import Path
 from tkinter import ttk
-from typing import Generic, Iterable, List, Optional, Tuple, TypeVar
+from typing import Dict, Generic, Iterable, List, Optional, TextIO, TypeVar
 
 
 class Checkbutton(ttk.Checkbutton):
@@ -103,7 +104,7 @@ class Listbox(tk.Listbox, Generic[TListboxValue]):
 
         self.__var = tk.Variable()
         self.config(listvariable=self.__var)
-        self.__values: Tuple[TListboxValue] = tuple()
+        self.__values: List[TListboxValue] = list()
 
     @property
     def values(self) -> List[TListboxValue]:
@@ -111,7 +112,7 @@ class Listbox(tk.Listbox, Generic[TListboxValue]):
 
     @values.setter
     def values(self, values: Iterable[TListboxValue]):
-        self.__values = tuple(values)
+        self.__values = list(values)
         self.__var.set(tuple(map(str, self.__values)))
 
     def clear(self):
@@ -119,6 +120,16 @@ class Listbox(tk.Listbox, Generic[TListboxValue]):
         self.delete(0, tk.END)
         self.update()
 
+    def set_item(self, index: int, item: TListboxValue):
+        """Replace one row in place without re-rendering the whole list"""
+        self.__values[index] = item
+
+        selected = self.selection_includes(index)
+        self.delete(index)
+        self.insert(index, str(item))
+        if selected:
+            self.selection_set(index)
+
     def append(self, item: TListboxValue):
         self.insert(tk.END, str(item))
         self.yview_moveto(1.0)
@@ -152,3 +163,121 @@ class Text(tk.Text):
 
     def flush(self):
         self.update()
+
+
+class LogView(Text):
+    """
+    Read-only log which keeps only about max_lines last lines in the widget, so long logs don't slow it down.
+    The full log can be written to log_path, it is rewritten on every clear().
+    """
+
+    _found_tag = "found"
+    _search_mark = "search"
+
+    def __init__(self, parent, *args, max_lines: int = 5000, log_path: Optional[Path] = None, **kwargs):
+        kwargs.setdefault("enabled", False)
+        super().__init__(parent, *args, **kwargs)
+        self.max_lines = max_lines
+        self.log_path = log_path
+        self.dropped_lines = 0
+        self._trim_step = max(1, max_lines // 10)  # Lines are removed in batches, not on every write
+        self._log_file: Optional[TextIO] = None
+        self.tag_configure(self._found_tag, background="yellow")
+        self.mark_set(self._search_mark, "1.0")
+        self.mark_gravity(self._search_mark, tk.LEFT)
+        self.bind("<Destroy>", lambda _event: self.close_log_file(), add=True)
+
+    def write(self, s: str):
+        if self._log_file is not None:
+            self._log_file.write(s)
+
+        at_end = self.yview()[1] >= 1.0  # Don't scroll if the user is reading the beginning of the log
+        self.config(state=tk.NORMAL)
+        self.insert(tk.END, s)
+        self._trim()
+        if not self.enabled:
+            self.configure(state=tk.DISABLED)
+        if at_end:
+            self.yview_moveto(1.0)
+
+    def _trim(self):
+        excess = int(self.index("end-1c").split(".")[0]) - self.max_lines
+        if excess >= self._trim_step:
+            self.delete("1.0", f"{excess + 1}.0")
+            self.dropped_lines += excess
+
+    def clear(self):
+        self.configure(state=tk.NORMAL)
+        self.delete(0.0, tk.END)
+        if not self.enabled:
+            self.configure(state=tk.DISABLED)
+        self.dropped_lines = 0
+        self.mark_set(self._search_mark, "1.0")
+
+        self.close_log_file()
+        if self.log_path is not None:
+            try:
+                self._log_file = open(self.log_path, "w", encoding="utf-8", errors="replace")
+            except OSError:
+                self._log_file = None  # Only the lines in the widget are kept
+
+    def flush(self):
+        if self._log_file is not None:
+            self._log_file.flush()
+
+    def close_log_file(self):
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    def find(self, pattern: str, backwards: bool = False) -> bool:
+        """Highlight the next (or previous) occurrence of the pattern in the shown lines, case-insensitive"""
+        continued = bool(self.tag_ranges(self._found_tag))
+        self.tag_remove(self._found_tag, "1.0", tk.END)
+        if not pattern:
+            return False
+
+        count = tk.IntVar()
+        start = f"{self._search_mark}+1c" if continued and not backwards else self._search_mark
+        index = self.search(pattern, start, backwards=backwards, nocase=True, count=count)
+        if not index:
+            return False
+
+        self.tag_add(self._found_tag, index, f"{index}+{count.get()}c")
+        self.mark_set(self._search_mark, index)
+        self.see(index)
+        return True
+
+
+class ThrottledListboxUpdater(Generic[TListboxValue]):
+    """
+    Collects changes of listbox rows and applies them at most once per interval.
+    Only the last value of every changed row is applied.
+    """
+
+    def __init__(self, listbox: Listbox[TListboxValue], interval_ms: int = 50):
+        self.listbox = listbox
+        self.interval_ms = interval_ms
+        self._pending: Dict[int, TListboxValue] = dict()
+        self._after_id: Optional[str] = None
+
+    def set_item(self, index: int, item: TListboxValue):
+        self._pending[index] = item
+        if self._after_id is None:
+            self._after_id = self.listbox.after(self.interval_ms, self.flush)
+
+    def flush(self):
+        self._cancel_after()
+        pending, self._pending = self._pending, dict()
+        for index, item in pending.items():
+            self.listbox.set_item(index, item)
+
+    def cancel(self):
+        """Drop the pending changes, e.g. when the listbox is destroyed"""
+        self._pending.clear()
+        self._cancel_after()
+
+    def _cancel_after(self):
+        if self._after_id is not None:
+            self.listbox.after_cancel(self._after_id)
+            self._after_id = None
@@ -0,0 +1,65 @@
+import os
+
+from df_translation_client.utils.catalog_cache import CatalogCache
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return path.read_text()
+
+
+def test_catalog_cache_hit(tmp_path):
+    file = tmp_path / "file.po"
+    file.write_text("content")
+
+    cache = CatalogCache()
+    loader = CountingLoader()
+
+    assert cache.get(file, loader) == "content"
+    assert cache.get(file, loader) == "content"
+    assert loader.calls == 1
+    assert file in cache
+
+
+def test_catalog_cache_invalidation(tmp_path):
+    file = tmp_path / "file.po"
+    file.write_text("content")
+
+    cache = CatalogCache()
+    loader = CountingLoader()
+    cache.get(file, loader)
+
+    file.write_text("new content")
+    stat = file.stat()
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.get(file, loader) == "new content"
+    assert loader.calls == 2
+    assert len(cache) == 1
+
+
+def test_catalog_cache_eviction(tmp_path):
+    files = []
+    for i in range(3):
+        file = tmp_path / f"file{i}.po"
+        file.write_text("x" * 10)
+        files.append(file)
+
+    cache = CatalogCache(max_items=2)
+    loader = CountingLoader()
+    for file in files:
+        cache.get(file, loader)
+
+    assert files[0] not in cache
+    assert files[1] in cache and files[2] in cache
+
+    cache = CatalogCache(max_size=25)
+    for file in files:
+        cache.get(file, loader)
+
+    assert len(cache) == 2
+    assert cache.total_size == 20
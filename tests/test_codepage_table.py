@@ -0,0 +1,90 @@
+import codecs
+import threading
+from typing import List
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from df_translation_client.utils.codepage_table import CodepageTable
+
+CODEPAGES = ["cp437", "cp866", "cp1251", "cp1252", "utf-8", "latin1"]
+
+table = CodepageTable(codecs.getencoder)
+table.filter_codepages(CODEPAGES, [])  # Generate the table in advance
+
+
+def reference_filter_codepages(encodings, strings):
+    for encoding in encodings:
+        encoder_function = codecs.getencoder(encoding)
+
+        try:
+            for text in strings:
+                encoded_text = encoder_function(text)[0]
+                if len(encoded_text) > len(text):
+                    raise ValueError
+            yield encoding
+        except (UnicodeEncodeError, ValueError, LookupError):
+            pass
+
+
+@given(st.lists(st.text(alphabet="abc üäßабвгдё€─═\U0001F600")))
+def test_codepage_table(strings: List[str]):
+    assert table.filter_codepages(CODEPAGES, strings) == list(reference_filter_codepages(CODEPAGES, strings))
+
+
+def test_codepage_table_file(tmp_path):
+    table_path = tmp_path / "codepages.bin"
+    strings = ["Какой-то текст", "Some text"]
+
+    table = CodepageTable(codecs.getencoder, version="1")
+    table.load_table(table_path)
+    assert table.filter_codepages(CODEPAGES, strings) == ["cp866", "cp1251"]
+    assert table_path.exists()
+
+    def get_encoder(_codepage):
+        raise AssertionError("The encoders must not be used when the table file exists")
+
+    table = CodepageTable(get_encoder, version="1")
+    table.load_table(table_path)
+    assert table.filter_codepages(CODEPAGES, strings) == ["cp866", "cp1251"]
+
+    # The table is regenerated if the version doesn't match
+    table = CodepageTable(codecs.getencoder, version="2")
+    table.load_table(table_path)
+    assert table.filter_codepages(CODEPAGES[:3], strings) == ["cp866", "cp1251"]
+
+
+def test_codepage_table_unknown_codepage():
+    with pytest.raises(LookupError):
+        CodepageTable(codecs.getencoder).filter_codepages(["cp437", "no-such-codepage"], [])
+
+
+def test_codepage_table_build_does_not_block(tmp_path):
+    build_started = threading.Event()
+    build_allowed = threading.Event()
+    requested = []
+
+    def get_encoder(codepage):
+        requested.append(codepage)
+        if codepage == "cp866":
+            build_started.set()
+            assert build_allowed.wait(10)
+        return codecs.getencoder(codepage)
+
+    table = CodepageTable(get_encoder)
+    table.load_table(tmp_path / "codepages.bin")
+    assert table.filter_codepages(["cp437"], ["abc"]) == ["cp437"]
+
+    thread = threading.Thread(target=table.filter_codepages, args=(["cp437", "cp866"], ["abc"]))
+    thread.start()
+    try:
+        assert build_started.wait(10)
+        # The table is being extended in another thread, but the existing codepages are still available
+        assert table.filter_codepages(["cp437"], ["ü"]) == ["cp437"]
+    finally:
+        build_allowed.set()
+        thread.join()
+
+    assert table.filter_codepages(["cp437", "cp866"], ["абв"]) == ["cp866"]
+    assert requested == ["cp437", "cp866"]  # The existing bitset is not built again
@@ -0,0 +1,51 @@
+import os
+
+from df_translation_client.utils.file_manifest import (
+    FileManifest,
+    get_file_hash,
+    get_manifest_hash,
+)
+
+
+def write_part(tmp_path, content):
+    part_file = tmp_path / "file.po.part"
+    part_file.write_bytes(content)
+    return part_file
+
+
+def test_replace_file(tmp_path):
+    file = tmp_path / "file.po"
+    manifest = FileManifest(tmp_path)
+
+    part_file = write_part(tmp_path, b"content")
+    assert manifest.replace_file(part_file, file, get_file_hash(part_file))
+    assert file.read_bytes() == b"content"
+    assert not part_file.exists()
+
+    mtime_ns = file.stat().st_mtime_ns
+    part_file = write_part(tmp_path, b"content")
+    assert not manifest.replace_file(part_file, file, get_file_hash(part_file))
+    assert file.stat().st_mtime_ns == mtime_ns
+    assert not part_file.exists()
+
+    part_file = write_part(tmp_path, b"changed")
+    assert manifest.replace_file(part_file, file, get_file_hash(part_file))
+    assert file.read_bytes() == b"changed"
+
+
+def test_get_manifest_hash(tmp_path):
+    file = tmp_path / "file.po"
+    manifest = FileManifest(tmp_path)
+    part_file = write_part(tmp_path, b"content")
+    file_hash = get_file_hash(part_file)
+    manifest.replace_file(part_file, file, file_hash)
+
+    assert get_manifest_hash(file) is None  # Not saved yet
+    manifest.save()
+    assert get_manifest_hash(file) == file_hash
+    assert FileManifest(tmp_path).get_hash(file) == file_hash
+
+    # The file is changed by something else
+    file.write_bytes(b"changed")
+    os.utime(file, ns=(0, 0))
+    assert get_manifest_hash(file) is None
@@ -0,0 +1,452 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from df_translation_client.downloaders import github_archive
+from df_translation_client.downloaders.abstract_downloader import close_downloaders
+from df_translation_client.downloaders.common import StatusEnum
+from df_translation_client.downloaders.github import GithubDownloader
+from df_translation_client.downloaders.github_archive import GithubArchiveDownloader
+from df_translation_client.utils.file_manifest import MANIFEST_FILE_NAME
+
+
+class StubServer(ThreadingHTTPServer):
+    """Serves files from the memory with ETag and Range support"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubRequestHandler)
+        self.files = dict()
+        self.full_responses = 0
+        self.failures = defaultdict(list)  # path -> failures to simulate on the next requests
+        self.ranges = []
+        self.connections = 0
+        self.delays = dict()  # path -> seconds to wait before responding
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.release = threading.Event()  # Lets a stalled response finish
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address
+        return f"http://{host}:{port}/"
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    server: StubServer
+
+    def do_GET(self):  # noqa: N802
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+
+        try:
+            time.sleep(self.server.delays.get(self.path.lstrip("/"), 0))
+            self.respond()
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+                self.server.completed += 1
+
+    def respond(self):
+        content = self.server.files.get(self.path.lstrip("/"))
+        if content is None:
+            self.send_error(404)
+            return
+
+        etag = '"{}"'.format(hashlib.sha1(content).hexdigest())
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        failures = self.server.failures[self.path.lstrip("/")]
+        failure = failures.pop(0) if failures else None
+        if failure == "unavailable":
+            self.send_error(503)
+            return
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == etag:
+            self.server.ranges.append(range_header)
+            start = int(range_header[len("bytes=") :].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+        else:
+            self.server.full_responses += 1
+            self.send_response(200)
+
+        body = content[start:]
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if failure == "truncate":
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+        elif failure == "stall":
+            self.wfile.write(body[: len(body) // 2])
+            self.wfile.flush()
+            self.server.release.wait(10)
+            self.close_connection = True
+        else:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.files["metadata-v2.json"] = json.dumps(
+        {"dwarf-fortress": {"hardcoded": {"ru": "hardcoded_ru.po"}, "objects": {"ru": "objects_ru.po"}}}
+    ).encode()
+    server.files["translations/hardcoded_ru.po"] = b"hardcoded"
+    server.files["translations/objects_ru.po"] = b"objects"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def download_stages(downloader, download_dir, resources):
+    async def run():
+        await downloader.connect()
+        file_path_pattern = str(download_dir / "{resource}_{language}.po")
+        try:
+            return [
+                stage
+                async for stage in downloader.async_downloader("dwarf-fortress", "ru", resources, file_path_pattern)
+            ]
+        finally:
+            await downloader.close()
+
+    return asyncio.run(run())
+
+
+def download(downloader, download_dir, resources):
+    """Get the final statuses of the resources"""
+    stages = download_stages(downloader, download_dir, resources)
+    return {stage.resource: stage.status for stage in stages if stage.status != StatusEnum.DOWNLOADING}
+
+
+def test_conditional_download(stub_server, tmp_path):
+    cache_dir = tmp_path / "cache"
+    download_dir = tmp_path / "download"
+    download_dir.mkdir()
+    resources = ["hardcoded", "objects"]
+
+    downloader = GithubDownloader(cache_dir=cache_dir, base_url=stub_server.base_url)
+    assert download(downloader, download_dir, resources) == dict(hardcoded=StatusEnum.OK, objects=StatusEnum.OK)
+    assert (download_dir / "hardcoded_ru.po").read_bytes() == b"hardcoded"
+    assert stub_server.full_responses == 3  # metadata and two files
+
+    # Nothing changed: nothing is transferred, even the metadata is taken from the cache
+    downloader = GithubDownloader(cache_dir=cache_dir, base_url=stub_server.base_url)
+    statuses = download(downloader, download_dir, resources)
+    assert statuses == dict(hardcoded=StatusEnum.UP_TO_DATE, objects=StatusEnum.UP_TO_DATE)
+    assert stub_server.full_responses == 3
+    assert downloader.projects == ["dwarf-fortress"]
+
+    # A file changed on the server
+    stub_server.files["translations/objects_ru.po"] = b"new objects"
+    statuses = download(downloader, download_dir, resources)
+    assert statuses == dict(hardcoded=StatusEnum.UP_TO_DATE, objects=StatusEnum.OK)
+    assert (download_dir / "objects_ru.po").read_bytes() == b"new objects"
+    assert stub_server.full_responses == 4  # The metadata is still up to date
+
+    # A local file is changed by the user: it's downloaded again
+    (download_dir / "hardcoded_ru.po").write_bytes(b"changed locally")
+    statuses = download(downloader, download_dir, resources)
+    assert statuses == dict(hardcoded=StatusEnum.OK, objects=StatusEnum.UP_TO_DATE)
+    assert (download_dir / "hardcoded_ru.po").read_bytes() == b"hardcoded"
+
+
+def test_unchanged_file_is_not_rewritten(stub_server, tmp_path):
+    downloader = GithubDownloader(base_url=stub_server.base_url)  # No conditional requests without the cache
+    assert download(downloader, tmp_path, ["objects"]) == dict(objects=StatusEnum.OK)
+    mtime_ns = (tmp_path / "objects_ru.po").stat().st_mtime_ns
+
+    assert download(downloader, tmp_path, ["objects"]) == dict(objects=StatusEnum.UP_TO_DATE)
+    assert (tmp_path / "objects_ru.po").stat().st_mtime_ns == mtime_ns
+    assert not (tmp_path / "objects_ru.po.part").exists()
+
+
+def test_failed_download(stub_server, tmp_path):
+    downloader = GithubDownloader(base_url=stub_server.base_url)
+    del stub_server.files["translations/objects_ru.po"]
+    statuses = download(downloader, tmp_path, ["hardcoded", "objects"])
+    assert statuses == dict(hardcoded=StatusEnum.OK, objects=StatusEnum.FAILED)
+
+
+def test_retry_and_resume(stub_server, tmp_path):
+    content = b"0123456789" * 100000
+    stub_server.files["translations/objects_ru.po"] = content
+    stub_server.failures["translations/objects_ru.po"] = ["unavailable", "truncate"]
+
+    downloader = GithubDownloader(base_url=stub_server.base_url, retry_delay=0.01)
+    statuses = [stage.status for stage in download_stages(downloader, tmp_path, ["objects"])]
+    assert statuses == [StatusEnum.DOWNLOADING, StatusEnum.RETRY, StatusEnum.RETRY, StatusEnum.OK]
+    assert (tmp_path / "objects_ru.po").read_bytes() == content
+    assert not (tmp_path / "objects_ru.po.part").exists()
+    assert len(stub_server.ranges) == 1 and stub_server.ranges[0] != "bytes=0-"
+
+
+def test_retries_exhausted(stub_server, tmp_path):
+    stub_server.failures["translations/objects_ru.po"] = ["unavailable"] * 3
+
+    downloader = GithubDownloader(base_url=stub_server.base_url, max_retries=2, retry_delay=0.01)
+    statuses = [stage.status for stage in download_stages(downloader, tmp_path, ["objects"])]
+    assert statuses == [StatusEnum.DOWNLOADING, StatusEnum.RETRY, StatusEnum.RETRY, StatusEnum.FAILED]
+    assert not (tmp_path / "objects_ru.po").exists()
+
+
+def test_concurrent_downloads(stub_server, tmp_path):
+    resources = [f"file{i}" for i in range(6)]
+    metadata = {"dwarf-fortress": {resource: {"ru": f"{resource}_ru.po"} for resource in resources}}
+    stub_server.files["metadata-v2.json"] = json.dumps(metadata).encode()
+    for i, resource in enumerate(resources):
+        stub_server.files[f"translations/{resource}_ru.po"] = resource.encode()
+        stub_server.delays[f"translations/{resource}_ru.po"] = 0.05 if i == 0 else 0.3
+
+    downloader = GithubDownloader(base_url=stub_server.base_url, max_concurrent_downloads=2)
+
+    async def run():
+        await downloader.connect()
+        completed_before = stub_server.completed
+        file_path_pattern = str(tmp_path / "{resource}_{language}.po")
+        first_finished = None
+        statuses = dict()
+        try:
+            async for stage in downloader.async_downloader("dwarf-fortress", "ru", resources, file_path_pattern):
+                if stage.status != StatusEnum.DOWNLOADING:
+                    statuses[stage.resource] = stage.status
+                    if first_finished is None:
+                        first_finished = stub_server.completed - completed_before
+        finally:
+            await downloader.close()
+        return statuses, first_finished
+
+    statuses, first_finished = asyncio.run(run())
+    assert statuses == {resource: StatusEnum.OK for resource in resources}
+    assert stub_server.max_in_flight == 2
+    assert first_finished < len(resources)  # The first stage is yielded while the other files are still downloaded
+
+
+def test_client_is_reused(stub_server, tmp_path):
+    downloader = GithubDownloader(base_url=stub_server.base_url, max_concurrent_downloads=1)
+    assert download(downloader, tmp_path, ["hardcoded", "objects"]) == dict(
+        hardcoded=StatusEnum.OK, objects=StatusEnum.OK
+    )
+    assert stub_server.connections == 1  # The metadata and the files are downloaded through the same connection
+
+
+def test_close_downloaders(stub_server):
+    downloader = GithubDownloader(base_url=stub_server.base_url)
+
+    async def run():
+        await downloader.connect()
+        client = downloader.client
+        await close_downloaders()
+        return client
+
+    client = asyncio.run(run())
+    assert client.is_closed
+
+
+def test_offline_mode(stub_server, tmp_path):
+    async def connect(downloader):
+        try:
+            await downloader.connect()
+        finally:
+            await downloader.close()
+
+    cache_dir = tmp_path / "cache"
+    downloader = GithubDownloader(cache_dir=cache_dir, base_url=stub_server.base_url)
+    assert not downloader.load_cached_metadata()
+    asyncio.run(connect(downloader))
+    assert not downloader.offline
+
+    base_url = stub_server.base_url
+    stub_server.shutdown()
+    stub_server.server_close()
+
+    downloader = GithubDownloader(cache_dir=cache_dir, base_url=base_url)
+    assert downloader.load_cached_metadata()
+    assert downloader.projects == ["dwarf-fortress"]
+
+    asyncio.run(connect(downloader))
+    assert downloader.offline
+    assert downloader.projects == ["dwarf-fortress"]
+
+    with pytest.raises(httpx.TransportError):
+        asyncio.run(connect(GithubDownloader(base_url=base_url)))
+
+
+def make_archive(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo("translations-backup-main/" + name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def test_archive_download(stub_server, tmp_path):
+    objects = bytes(range(256)) * 1000
+    stub_server.files["archive.tar.gz"] = make_archive(
+        {
+            "README.md": b"readme",
+            "translations/objects_ru.po": objects,
+            "translations/objects_de.po": b"objects de",
+        }
+    )
+    stub_server.failures["archive.tar.gz"] = ["truncate"]
+
+    downloader = GithubArchiveDownloader(
+        base_url=stub_server.base_url,
+        archive_url=stub_server.base_url + "archive.tar.gz",
+        retry_delay=0.01,
+    )
+    statuses = download(downloader, tmp_path, ["hardcoded", "objects"])
+    assert statuses == dict(hardcoded=StatusEnum.FAILED, objects=StatusEnum.OK)
+    assert (tmp_path / "objects_ru.po").read_bytes() == objects
+    assert sorted(path.name for path in tmp_path.iterdir()) == [MANIFEST_FILE_NAME, "objects_ru.po"]
+
+
+def test_archive_download_stats(stub_server, tmp_path):
+    archive = make_archive(
+        {
+            "translations/hardcoded_ru.po": os.urandom(10_000),
+            "translations/objects_ru.po": os.urandom(100_000),
+        }
+    )
+    stub_server.files["archive.tar.gz"] = archive
+
+    downloader = GithubArchiveDownloader(
+        base_url=stub_server.base_url, archive_url=stub_server.base_url + "archive.tar.gz"
+    )
+    stages = download_stages(downloader, tmp_path, ["hardcoded", "objects"])
+    stages = {stage.resource: stage for stage in stages if stage.status == StatusEnum.OK}
+    assert set(stages) == {"hardcoded", "objects"}
+    assert all(stage.http_status == 200 and stage.elapsed > 0 for stage in stages.values())
+    assert 10_000 < stages["hardcoded"].bytes_transferred < stages["objects"].bytes_transferred
+    # The archive is shared, the rest of it after the last file (padding) isn't counted
+    assert sum(stage.bytes_transferred for stage in stages.values()) <= len(archive)
+
+
+def test_archive_download_missing_language(stub_server, tmp_path):
+    stub_server.files["metadata-v2.json"] = json.dumps(
+        {"dwarf-fortress": {"hardcoded": {"de": "hardcoded_de.po"}, "objects": {"ru": "objects_ru.po"}}}
+    ).encode()
+    stub_server.files["archive.tar.gz"] = make_archive({"translations/objects_ru.po": b"objects"})
+
+    downloader = GithubArchiveDownloader(
+        base_url=stub_server.base_url, archive_url=stub_server.base_url + "archive.tar.gz"
+    )
+    stages = download_stages(downloader, tmp_path, ["hardcoded", "objects"])
+    statuses = {stage.resource: stage.status for stage in stages if stage.status != StatusEnum.DOWNLOADING}
+    assert statuses == dict(hardcoded=StatusEnum.FAILED, objects=StatusEnum.OK)
+    assert "KeyError" in next(stage.error_text for stage in stages if stage.status == StatusEnum.FAILED)
+    assert (tmp_path / "objects_ru.po").read_bytes() == b"objects"
+
+
+@pytest.mark.parametrize("stop_loop", [False, True])
+def test_archive_download_cancelled(stub_server, tmp_path, monkeypatch, stop_loop):
+    stub_server.files["archive.tar.gz"] = make_archive(
+        {
+            "translations/hardcoded_ru.po": b"hardcoded",
+            "translations/objects_ru.po": os.urandom(200_000),  # Not compressible, stalls in the middle of it
+        }
+    )
+    stub_server.failures["archive.tar.gz"] = ["stall"]
+
+    extraction_stopped = threading.Event()
+    original_extract_files = github_archive.extract_files
+
+    def extract_files(*args):
+        try:
+            original_extract_files(*args)
+        finally:
+            extraction_stopped.set()
+
+    monkeypatch.setattr(github_archive, "extract_files", extract_files)
+
+    downloader = GithubArchiveDownloader(
+        base_url=stub_server.base_url, archive_url=stub_server.base_url + "archive.tar.gz"
+    )
+    stages = downloader.async_downloader(
+        "dwarf-fortress", "ru", ["hardcoded", "objects"], str(tmp_path / "{resource}_{language}.po")
+    )
+
+    async def first_extracted():
+        await downloader.connect()
+        async for stage in stages:
+            if stage.status == StatusEnum.OK:
+                if not stop_loop:
+                    await stages.aclose()  # Cancel the download
+                return stage  # Otherwise the loop is stopped like on exit, with the download still running
+
+    loop = asyncio.new_event_loop()
+    try:
+        stage = loop.run_until_complete(asyncio.wait_for(first_extracted(), 5))
+        assert stage.resource == "hardcoded"
+        # The rest of the archive doesn't come, but the extracting thread doesn't wait for it forever
+        assert extraction_stopped.wait(1)
+    finally:
+        stub_server.release.set()
+        loop.run_until_complete(stages.aclose())
+        loop.run_until_complete(downloader.close())
+        loop.close()
+
+    assert not (tmp_path / "objects_ru.po").exists()
+
+
+def test_download_stats(stub_server, tmp_path):
+    cache_dir = tmp_path / "cache"
+    content = b"0123456789" * 10000
+    stub_server.files["translations/objects_ru.po"] = content
+
+    downloader = GithubDownloader(cache_dir=cache_dir, base_url=stub_server.base_url)
+    stages = download_stages(downloader, tmp_path, ["objects"])
+    assert stages[-1].status == StatusEnum.OK
+    assert stages[-1].http_status == 200
+    assert stages[-1].bytes_transferred == len(content)
+    assert stages[-1].elapsed > 0
+    assert {"wait", "receive", "disk"} <= set(stages[-1].timings)  # The connection is reused after connect()
+
+    stages = download_stages(downloader, tmp_path, ["objects"])
+    assert stages[-1].status == StatusEnum.UP_TO_DATE
+    assert stages[-1].http_status == 304
+    assert stages[-1].bytes_transferred == 0
+
+    logs = sorted((cache_dir / "logs").glob("*.json"))
+    assert len(logs) == 2
+    log = json.loads(logs[0].read_text())
+    assert log["project"] == "dwarf-fortress"
+    assert log["bytes"] == len(content)
+    assert [(stage["resource"], stage["status"], stage["http_status"]) for stage in log["stages"]] == [
+        ("objects", "OK", 200)
+    ]
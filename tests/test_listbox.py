@@ -0,0 +1,89 @@
+import tkinter as tk
+
+import pytest
+
+from df_translation_client.widgets.custom_widgets import (
+    Listbox,
+    ThrottledListboxUpdater,
+)
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("No display")
+    yield root
+    root.destroy()
+
+
+@pytest.fixture
+def listbox(root):
+    listbox = Listbox(root)
+    listbox.values = ["a", "b", "c"]
+    return listbox
+
+
+def wait(root, delay_ms):
+    root.after(delay_ms)
+    root.update()
+
+
+def test_listbox_set_item(listbox):
+    listbox.selection_set(1)
+    listbox.set_item(1, "B")
+    listbox.set_item(2, "C")
+
+    assert listbox.values == ["a", "B", "C"]
+    assert listbox.get(0, tk.END) == ("a", "B", "C")
+    assert listbox.selected() == ["B"]  # The selection is kept
+
+
+@pytest.fixture
+def updates(listbox, monkeypatch):
+    updates = []
+    set_item = listbox.set_item
+
+    def record_set_item(index, item):
+        updates.append((index, item))
+        set_item(index, item)
+
+    monkeypatch.setattr(listbox, "set_item", record_set_item)
+    return updates
+
+
+def test_throttled_listbox_updater(root, listbox, updates):
+    updater = ThrottledListboxUpdater(listbox, interval_ms=10)
+    updater.set_item(0, "a1")
+    updater.set_item(0, "a2")
+    updater.set_item(2, "c1")
+    assert updates == []
+
+    wait(root, 50)
+    assert updates == [(0, "a2"), (2, "c1")]  # Only the last value of a row is applied
+    assert listbox.values == ["a2", "b", "c1"]
+
+
+def test_throttled_listbox_updater_flush(root, listbox, updates):
+    updater = ThrottledListboxUpdater(listbox, interval_ms=10)
+    updater.set_item(1, "b1")
+    updater.flush()
+    assert updates == [(1, "b1")]
+
+    wait(root, 50)
+    assert updates == [(1, "b1")]  # The scheduled update is cancelled
+
+
+def test_throttled_listbox_updater_cancel(root, listbox, updates):
+    updater = ThrottledListboxUpdater(listbox, interval_ms=10)
+    updater.set_item(1, "b1")
+    updater.cancel()
+
+    wait(root, 50)
+    assert updates == []
+    assert listbox.values == ["a", "b", "c"]
+
+    updater.set_item(1, "b2")  # The updater still works after the cancel
+    wait(root, 50)
+    assert listbox.values == ["a", "b2", "c"]
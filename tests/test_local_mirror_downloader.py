@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+from df_translation_client.downloaders.common import StatusEnum
+from df_translation_client.downloaders.local_mirror import LocalMirrorDownloader
+
+
+@pytest.fixture
+def mirror_dir(tmp_path):
+    mirror_dir = tmp_path / "translations-backup"
+    (mirror_dir / "translations").mkdir(parents=True)
+    metadata = {
+        "dwarf-fortress": {
+            "hardcoded": {"ru": "hardcoded_ru.po", "de": "hardcoded_de.po"},
+            "objects": {"ru": "objects_ru.po"},
+            "missing": {"ru": "missing_ru.po"},
+        }
+    }
+    (mirror_dir / "metadata-v2.json").write_text(json.dumps(metadata))
+    (mirror_dir / "translations" / "hardcoded_ru.po").write_bytes(b"hardcoded")
+    (mirror_dir / "translations" / "objects_ru.po").write_bytes(b"objects")
+    return mirror_dir
+
+
+def download(downloader, download_dir, resources):
+    async def run():
+        await downloader.connect()
+        file_path_pattern = str(download_dir / "{resource}_{language}.po")
+        return {
+            stage.resource: stage.status
+            async for stage in downloader.async_downloader("dwarf-fortress", "ru", resources, file_path_pattern)
+            if stage.status != StatusEnum.DOWNLOADING
+        }
+
+    return asyncio.run(run())
+
+
+def test_list_metadata(mirror_dir):
+    async def run():
+        downloader = LocalMirrorDownloader(mirror_dir)
+        await downloader.connect()
+        assert await downloader.list_projects() == ["dwarf-fortress"]
+        assert await downloader.list_resources("dwarf-fortress") == ["hardcoded", "objects", "missing"]
+        assert await downloader.list_languages("dwarf-fortress", "hardcoded") == ["ru", "de"]
+
+    asyncio.run(run())
+
+
+def test_download(mirror_dir, tmp_path):
+    download_dir = tmp_path / "download"
+    download_dir.mkdir()
+    downloader = LocalMirrorDownloader(mirror_dir)
+
+    statuses = download(downloader, download_dir, ["hardcoded", "objects", "missing"])
+    assert statuses == dict(hardcoded=StatusEnum.OK, objects=StatusEnum.OK, missing=StatusEnum.FAILED)
+    assert (download_dir / "hardcoded_ru.po").read_bytes() == b"hardcoded"
+
+    (mirror_dir / "translations" / "objects_ru.po").write_bytes(b"new objects")
+    statuses = download(downloader, download_dir, ["hardcoded", "objects"])
+    assert statuses == dict(hardcoded=StatusEnum.UP_TO_DATE, objects=StatusEnum.OK)
+    assert (download_dir / "objects_ru.po").read_bytes() == b"new objects"
+
+
+def test_download_stats(mirror_dir, tmp_path):
+    downloader = LocalMirrorDownloader(mirror_dir)
+
+    async def run():
+        await downloader.connect()
+        file_path_pattern = str(tmp_path / "{resource}_{language}.po")
+        return [
+            stage async for stage in downloader.async_downloader("dwarf-fortress", "ru", ["objects"], file_path_pattern)
+        ]
+
+    stage = asyncio.run(run())[-1]
+    assert stage.status == StatusEnum.OK
+    assert stage.bytes_transferred == len(b"objects")
+    assert stage.elapsed > 0
@@ -0,0 +1,38 @@
+import tkinter as tk
+
+import pytest
+
+from df_translation_client.widgets.custom_widgets import LogView
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("No display")
+    yield root
+    root.destroy()
+
+
+def test_log_view(root, tmp_path):
+    log_path = tmp_path / "patch.log"
+    log_view = LogView(root, max_lines=100, log_path=log_path)
+    log_view.clear()
+    text = "".join(f"line {i}\n" for i in range(1000))
+    for i in range(0, len(text), 100):
+        log_view.write(text[i : i + 100])
+    log_view.flush()
+
+    shown = log_view.get("1.0", "end-1c")
+    assert len(shown.splitlines()) <= 110
+    assert text.endswith(shown)
+    assert log_view.dropped_lines == 1000 - len(shown.splitlines())
+    assert log_path.read_text() == text
+
+    assert log_view.find("LINE 999")
+    assert not log_view.find("line 0\n")  # Not shown anymore
+
+    log_view.clear()
+    assert log_view.get("1.0", "end-1c") == ""
+    assert log_path.read_text() == ""
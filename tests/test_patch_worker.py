@@ -0,0 +1,185 @@
+import multiprocessing as mp
+import os
+from pathlib import Path
+
+from df_translation_client.utils import patch_worker
+from df_translation_client.utils.patch_worker import (
+    END_OF_JOB,
+    PatchWorker,
+    ProcessMessageWrapper,
+    load_translation,
+    receive_output,
+    run_patch_with_translation_file,
+)
+
+
+def print_pid(stdout, stderr, text):
+    print(text, os.getpid(), file=stdout)
+
+
+def crash(stdout, stderr):
+    os._exit(1)
+
+
+def fail(stdout, stderr):
+    raise ValueError("Something went wrong")
+
+
+def print_translation(stdout, stderr, translation_file, exclusions_by_language, keep=False):
+    dictionary = load_translation(Path(translation_file), exclusions_by_language, stdout, keep)
+    print(sorted(dictionary.items()), file=stdout)
+    print("kept" if patch_worker._cleaned_dictionary is not None else "freed", file=stdout)
+
+
+def write_po(path, entries):
+    lines = ['msgid ""', 'msgstr ""', '"Language: ru\\n"', ""]
+    for original, translation in entries:
+        lines += [f'msgid "{original}"', f'msgstr "{translation}"', ""]
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def run_job(worker, target, **kwargs):
+    """Returns the output of the job and whether the process crashed"""
+    process = worker.process
+    messages = worker.submit(target, **kwargs)
+    output = []
+    while True:
+        if messages.poll(0.1):
+            try:
+                text, finished = receive_output(messages, 1024)
+            except EOFError:
+                return "".join(output), True
+
+            output.append(text)
+            if finished:
+                return "".join(output), False
+        elif not process.is_alive():
+            return "".join(output), True
+
+
+def test_message_wrapper():
+    receiver, sender = mp.Pipe(duplex=False)
+    stdout = ProcessMessageWrapper(sender, flush_size=10, flush_interval=60)
+    print("a", file=stdout)
+    print("б", file=stdout)
+    assert not receiver.poll()  # Buffered
+
+    print("c" * 10, file=stdout)
+    assert receiver.poll()  # The buffer is full
+    stdout.write("d")
+    stdout.flush()
+    sender.send_bytes(END_OF_JOB)
+    assert receive_output(receiver, 1024) == ("a\nб\n" + "c" * 10 + "\nd", True)
+
+
+def test_patch_worker():
+    worker = PatchWorker()
+    worker.start()
+    try:
+        output, crashed = run_job(worker, print_pid, text="first")
+        assert not crashed
+        worker.job_finished(crashed)
+        text, pid = output.split()
+        assert text == "first"
+
+        output, crashed = run_job(worker, print_pid, text="second")
+        worker.job_finished(crashed)
+        assert output.split() == ["second", pid]  # The same process is reused
+
+        output, crashed = run_job(worker, fail)
+        worker.job_finished(crashed)
+        assert not crashed
+        assert "ValueError: Something went wrong" in output
+
+        output, crashed = run_job(worker, crash)
+        worker.job_finished(crashed)
+        assert crashed
+
+        output, crashed = run_job(worker, print_pid, text="third")
+        worker.job_finished(crashed)
+        assert output.split()[0] == "third"
+        assert output.split()[1] != pid  # The crashed process is replaced
+
+        worker.recycle()
+        assert worker.alive
+    finally:
+        worker.stop()
+
+    assert not worker.alive
+
+
+def test_load_translation_in_worker(tmp_path):
+    translation_file = tmp_path / "hardcoded_ru.po"
+    write_po(translation_file, [(" leading", "в начале"), ("text", "текст")])
+
+    worker = PatchWorker()
+    worker.start()
+    try:
+        output, crashed = run_job(
+            worker,
+            print_translation,
+            translation_file=str(translation_file),
+            exclusions_by_language=dict(),
+            keep=True,
+        )
+        worker.job_finished(crashed)
+        assert output.startswith("Loading hardcoded_ru.po...")
+        assert "(' leading', ' в начале')" in output
+        assert output.endswith("kept\n")
+
+        # The dictionary is kept in the worker, only the exclusions are applied
+        output, crashed = run_job(
+            worker,
+            print_translation,
+            translation_file=str(translation_file),
+            exclusions_by_language=dict(ru=[" leading"]),
+            keep=True,
+        )
+        worker.job_finished(crashed)
+        assert output.startswith("Using already loaded hardcoded_ru.po")
+        assert "(' leading', 'в начале')" in output
+
+        write_po(translation_file, [("text", "новый текст")])
+        output, crashed = run_job(
+            worker,
+            print_translation,
+            translation_file=str(translation_file),
+            exclusions_by_language=dict(),
+            keep=True,
+        )
+        worker.job_finished(crashed)
+        assert output.startswith("Loading hardcoded_ru.po...")
+        assert "('text', 'новый текст')" in output and "leading" not in output
+
+        # By default, the translation isn't kept in the worker after the job
+        output, crashed = run_job(
+            worker, print_translation, translation_file=str(translation_file), exclusions_by_language=dict()
+        )
+        worker.job_finished(crashed)
+        assert output.startswith("Loading hardcoded_ru.po...")
+        assert "('text', 'новый текст')" in output
+        assert output.endswith("freed\n")
+    finally:
+        worker.stop()
+
+
+def test_run_patch_with_translation_file(tmp_path, monkeypatch):
+    translation_file = tmp_path / "hardcoded_ru.po"
+    write_po(translation_file, [("text ", "текст"), ("other", "другой")])
+
+    calls = []
+    monkeypatch.setattr(patch_worker, "_cleaned_dictionary", None)
+    monkeypatch.setattr(patch_worker.dfrus, "run", lambda **kwargs: calls.append(kwargs))
+
+    receiver, sender = mp.Pipe(duplex=False)
+    stdout = ProcessMessageWrapper(sender)
+    run_patch_with_translation_file(
+        str(translation_file), dict(ru=["text "]), path="Dwarf Fortress.exe", codepage="cp1251", stdout=stdout
+    )
+    assert len(calls) == 1
+    assert calls[0]["trans_table"]["text "] == "текст"
+    assert calls[0]["trans_table"]["other"] == "другой"
+    assert calls[0]["path"] == "Dwarf Fortress.exe" and calls[0]["stdout"] is stdout
+
+    stdout.flush()
+    assert f"{len(calls[0]['trans_table'])} strings loaded" in receive_output(receiver, 1024)[0]
@@ -0,0 +1,94 @@
+import os
+
+from df_translation_client.utils.po_index import PoIndex, get_file_hash
+
+
+def touch(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_po_index(tmp_path):
+    file = tmp_path / "file.po"
+    file.write_text("content")
+
+    index = PoIndex()
+    assert index.get(file) is None
+
+    index.add(file, language="ru", entries=10)
+    index.set_codepages(file, ["cp1251"])
+    info = index.get(file)
+    assert info.language == "ru"
+    assert info.entries == 10
+    assert info.hash == get_file_hash(file)
+    assert info.codepages == ["cp1251"]
+
+    # Same content, different mtime: the entry is still valid
+    touch(file)
+    assert index.get(file) == info
+
+    # Changed content: the entry is invalidated
+    file.write_text("new content")
+    touch(file)
+    assert index.get(file) is None
+
+
+def test_po_index_supported_codepages(tmp_path):
+    file = tmp_path / "file.po"
+    file.write_text("content")
+
+    index = PoIndex()
+    index.check_supported_codepages(["cp1251", "cp437"])
+    index.add(file, language="ru", entries=10)
+    index.set_codepages(file, ["cp1251"])
+
+    index.check_supported_codepages(["cp1251", "cp437"])
+    assert index.get(file).codepages == ["cp1251"]
+
+    index.check_supported_codepages(["cp1251", "cp437", "cp866"])
+    assert index.get(file).codepages is None
+
+
+def test_po_index_persistence(tmp_path):
+    file = tmp_path / "file.po"
+    file.write_text("content")
+    index_path = tmp_path / "index.json"
+
+    index = PoIndex(index_path)
+    index.add(file, language="ru", entries=10)
+    index.save_index()
+
+    index = PoIndex()
+    index.load_index(index_path)
+    assert index.get(file).language == "ru"
+
+
+def test_po_index_changed_while_reading(tmp_path):
+    file = tmp_path / "file.po"
+    file.write_text("content")
+
+    index = PoIndex()
+    stat = file.stat()
+    file.write_text("changed content")
+    index.add(file, language="ru", entries=10, stat=stat)
+    index.set_codepages(file, ["cp1251"])
+    assert index.get(file) is None
+
+
+def test_po_index_prunes_deleted_files(tmp_path):
+    files = [tmp_path / "file1.po", tmp_path / "file2.po"]
+    index_path = tmp_path / "index.json"
+
+    index = PoIndex(index_path)
+    for file in files:
+        file.write_text("content")
+        index.add(file, language="ru")
+    index.save_index()
+
+    files[0].unlink()
+    index.save_index()
+    assert len(index) == 1
+
+    index = PoIndex()
+    index.load_index(index_path)
+    assert len(index) == 1 and index.get(files[1]).language == "ru"
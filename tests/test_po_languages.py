@@ -0,0 +1,183 @@
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from df_gettext_toolkit.utils.fix_translated_strings import cleanup_string, fix_spaces
+
+from df_translation_client.utils import po_languages
+from df_translation_client.utils.po_index import PoIndex
+from df_translation_client.utils.po_languages import (
+    CleanedDictionary,
+    _read_po_data,
+    async_filter_files_by_language,
+    async_get_languages,
+    async_load_dictionary_raw,
+    catalog_cache,
+    cleanup_translations_string,
+    get_suitable_codepages_for_directory,
+    get_suitable_codepages_for_file,
+    load_dictionary_raw,
+    load_dictionary_with_cleanup,
+    load_po_data,
+    load_po_files,
+    reload_cleanup_functions,
+    shutdown_process_pool,
+)
+
+
+def write_po(path, language, entries):
+    lines = ['msgid ""', 'msgstr ""', f'"Language: {language}\\n"', ""]
+    for original, translation in entries:
+        lines += [f'msgid "{original}"', f'msgstr "{translation}"', ""]
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+@pytest.fixture
+def po_files(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"file{i}_ru.po"
+        write_po(path, "ru", [(f"text {i}", f"текст {i}"), ("common", "общий")])
+        paths.append(path)
+    return paths
+
+
+class ChangingFilesPool:
+    """Parses the files in the current process, then changes them, as if they were edited while being parsed"""
+
+    def map(self, function, paths):
+        results = [function(path) for path in paths]
+        for path in paths:
+            with open(path, "a", encoding="utf-8") as file:
+                file.write('\nmsgid "added"\nmsgstr "добавлено"\n')
+        return results
+
+
+class BrokenPool:
+    def map(self, function, paths):
+        raise BrokenProcessPool("A worker process died")
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def test_load_po_files(po_files):
+    try:
+        loaded = load_po_files(po_files)
+    finally:
+        shutdown_process_pool()
+
+    assert loaded == [_read_po_data(path) for path in po_files]
+    assert all(data.language == "ru" and data.message_count == 2 for data in loaded)
+    assert all(path in catalog_cache for path in po_files)
+
+
+def test_load_po_files_changed_while_parsing(po_files, monkeypatch):
+    monkeypatch.setattr(po_languages, "_process_pool", ChangingFilesPool())
+    loaded = load_po_files(po_files)
+    assert all(data.message_count == 2 for data in loaded)
+
+    # The cached data is stamped with the stat taken before parsing, so the changed files are parsed again
+    assert all(catalog_cache.lookup(path)[0] is None for path in po_files)
+    monkeypatch.setattr(po_languages, "_process_pool", None)
+    assert all(data.message_count == 3 for data in load_po_files(po_files[:1]))
+
+
+def test_load_po_files_broken_pool(po_files, monkeypatch):
+    monkeypatch.setattr(po_languages, "_process_pool", BrokenPool())
+    loaded = load_po_files(po_files)
+    assert loaded == [_read_po_data(path) for path in po_files]
+    assert po_languages._process_pool is None  # A new pool is created on the next call
+
+
+@pytest.mark.parametrize("directory", [False, True])
+def test_codepages_of_file_changed_while_parsing(tmp_path, monkeypatch, directory):
+    path = tmp_path / "file_ru.po"
+    write_po(path, "ru", [("text", "текст")])
+    index = PoIndex()
+    monkeypatch.setattr(po_languages, "po_index", index)
+
+    def read_and_change(path):
+        data = _read_po_data(path)
+        write_po(path, "ru", [("text", "текст"), ("other", "другой")])
+        return data
+
+    monkeypatch.setattr(po_languages, "_read_po_data", read_and_change)
+    if directory:
+        get_suitable_codepages_for_directory(tmp_path, "ru")
+    else:
+        get_suitable_codepages_for_file(path)
+
+    # The codepages of the old content are not stored for the new one
+    info = index.get(path)
+    assert info is None or info.codepages is None
+
+
+def test_cleaned_dictionary(tmp_path):
+    path = tmp_path / "hardcoded_ru.po"
+    write_po(path, "ru", [(" leading", "в начале"), ("trailing ", "в конце"), (" both ", "оба"), ("none", "нет")])
+
+    exclusions = dict(ru=[], de=[" both "])
+    dictionary = CleanedDictionary(path, exclusions)
+    assert dictionary.items == set(load_dictionary_with_cleanup(path, exclusions))
+
+    for ru_exclusions in [[" leading"], [" leading", "trailing ", " both "], ["trailing "], [], ["none"]]:
+        exclusions = dict(ru=ru_exclusions, de=[" both "])
+        dictionary.update_exclusions(exclusions)
+        assert dictionary.items == set(load_dictionary_with_cleanup(path, exclusions))
+
+    assert dictionary.is_actual(path)
+    write_po(path, "ru", [("none", "ничего")])
+    assert not dictionary.is_actual(path)
+
+
+def test_load_dictionary_raw(tmp_path):
+    path = tmp_path / "hardcoded_ru.po"
+    entries = [("text", "текст"), ("other", "другой")]
+    write_po(path, "ru", entries)
+
+    catalog_cache.invalidate(path)
+    streamed, language = load_dictionary_raw(path)
+    assert list(streamed) == entries and language == "ru"
+
+    load_po_data(path)
+    cached, language = load_dictionary_raw(path)
+    assert list(cached) == entries and language == "ru"
+
+
+def test_async_loading(tmp_path):
+    write_po(tmp_path / "hardcoded_ru.po", "ru", [("text", "текст")])
+    write_po(tmp_path / "objects_ru.po", "ru", [("other", "другой")])
+    write_po(tmp_path / "hardcoded_de.po", "de", [("text", "Text")])
+
+    async def load():
+        languages = await async_get_languages(tmp_path)
+        files = await async_filter_files_by_language(tmp_path, "ru")
+        dictionary, language = await async_load_dictionary_raw(tmp_path / "hardcoded_de.po")
+        return languages, files, dict(dictionary), language
+
+    languages, files, dictionary, language = asyncio.run(load())
+    assert languages == ["de", "ru"]
+    assert files == ["hardcoded_ru.po", "objects_ru.po"]
+    assert language == "de" and dictionary["text"] == "Text"
+
+
+@pytest.mark.parametrize("original", ["text", " leading", "trailing ", " both "])
+@pytest.mark.parametrize("translation", ["текст", " текст ", "текст\u00a0"])
+@pytest.mark.parametrize("excluded", [None, "original", "other"])
+def test_cleanup_translations_string(original, translation, excluded):
+    if excluded is None:
+        exclusions = None
+    else:
+        exclusions = {original if excluded == "original" else "other", "something else"}
+
+    expected = fix_spaces(original, cleanup_string(translation), exclusions, exclusions)
+    # The second call gets the memoized result
+    for _ in range(2):
+        assert cleanup_translations_string(original, translation, exclusions, exclusions) == expected
+
+
+def test_reload_cleanup_functions():
+    cleanup_translations_string(" text", "текст", None, None)
+    reload_cleanup_functions()
+    assert po_languages._cleanup_translations_string_cached.cache_info().currsize == 0
@@ -0,0 +1,135 @@
+from io import StringIO
+
+import pytest
+from babel.messages.pofile import read_po
+
+from df_translation_client.utils.po_reader import (
+    get_header_language,
+    iter_messages,
+    read_header,
+)
+
+HEADER = r"""# Translators:
+# Someone <someone@example.com>, 2023
+#
+#, fuzzy
+msgid ""
+msgstr ""
+"Project-Id-Version: dwarf-fortress\n"
+"Last-Translator: Someone <someone@example.com>\n"
+"Language-Team: Russian\n"
+"Language: {language}\n"
+"MIME-Version: 1.0\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+
+"""
+
+MESSAGES = r"""
+#: location
+msgid "Some text"
+msgstr "Какой-то текст"
+
+msgid ""
+"Multiline "
+"text"
+msgstr ""
+"Многострочный "
+"текст"
+"""
+
+
+def get_babel_language(text):
+    for key, value in read_po(StringIO(text)).mime_headers:
+        if key == "Language":
+            return value
+    else:
+        return None
+
+
+@pytest.mark.parametrize("language", ["ru", "zh-CN", "pt_BR"])
+def test_read_header(language):
+    text = HEADER.format(language=language) + MESSAGES
+    headers = read_header(StringIO(text))
+    assert headers is not None
+    assert get_header_language(headers) == get_babel_language(text)
+
+
+def test_read_header_without_language():
+    text = HEADER.replace('"Language: {language}\\n"\n', "") + MESSAGES
+    assert get_header_language(read_header(StringIO(text))) is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        MESSAGES,
+        'msgid ""\n',
+        'msgid ""\nmsgstr "Language: ru\n',
+    ],
+)
+def test_read_header_malformed(text):
+    assert read_header(StringIO(text)) is None
+
+
+def test_read_header_stops_after_header():
+    file = StringIO(HEADER.format(language="ru") + MESSAGES)
+    read_header(file)
+    assert "Some text" in file.read()
+
+
+ENTRIES = r"""
+#, fuzzy
+msgid "Fuzzy"
+msgstr "Неточный"
+
+msgctxt "context"
+msgid "Some text"
+msgstr "Текст с контекстом"
+
+msgid "Escaped \"quotes\"\n"
+msgstr "Экранированные \"кавычки\"\n"
+
+msgid "One file"
+msgid_plural "%d files"
+msgstr[0] "%d файл"
+msgstr[1] "%d файла"
+msgstr[2] "%d файлов"
+
+msgid "Untranslated"
+msgstr ""
+
+#~ msgid "Obsolete"
+#~ msgstr "Устаревший"
+
+msgid "Some text"
+msgstr "Дубликат"
+
+msgctxt "context"
+msgid "Some text"
+msgstr "Дубликат с контекстом"
+
+msgid "One file"
+msgstr "Один файл"
+"""
+
+
+@pytest.mark.parametrize("language", ["ru", "zh-CN", "pt_BR"])
+def test_iter_messages(language):
+    text = HEADER.format(language=language) + MESSAGES + ENTRIES
+    expected = [(entry.id, entry.string) for entry in read_po(StringIO(text))]
+    result = list(iter_messages(StringIO(text)))
+
+    # The header entry is regenerated by babel, so compare only its id
+    assert result[0][0] == expected[0][0] == ""
+    assert result[1:] == expected[1:]
+
+
+@pytest.mark.parametrize("text", ["", MESSAGES, MESSAGES + ENTRIES])
+def test_iter_messages_without_header(text):
+    expected = [(entry.id, entry.string) for entry in read_po(StringIO(text))]
+    result = list(iter_messages(StringIO(text)))
+
+    assert result[0] == ("", "")
+    assert expected[0][0] == ""
+    assert result[1:] == expected[1:]
@@ -0,0 +1,45 @@
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from df_translation_client.utils.shared_dictionary import (
+    read_dictionary,
+    write_dictionary,
+    write_temporary_dictionary,
+)
+
+
+@given(st.dictionaries(st.text(), st.text()))
+def test_write_read_dictionary(dictionary):
+    path = write_temporary_dictionary(dictionary)
+    try:
+        result = read_dictionary(path)
+    finally:
+        path.unlink()
+
+    assert result == dictionary
+    assert list(result) == list(dictionary)
+
+
+def test_read_not_a_dictionary(tmp_path):
+    path = tmp_path / "file.dict"
+    path.write_bytes(b"something else")
+    with pytest.raises(ValueError):
+        read_dictionary(path)
+
+
+def test_write_dictionary(tmp_path):
+    path = tmp_path / "file.dict"
+    write_dictionary({"Some text": "Какой-то текст", "": ""}, path)
+    assert read_dictionary(path) == {"Some text": "Какой-то текст", "": ""}
+
+
+def test_write_dictionary_with_plural_forms(tmp_path):
+    path = tmp_path / "file.dict"
+    dictionary = {
+        "Some text": "Какой-то текст",
+        ("One file", "%d files"): ("%d файл", "%d файла", "%d файлов"),
+        "Other text": "Другой текст",
+    }
+    write_dictionary(dictionary, path)
+    assert read_dictionary(path) == {"Some text": "Какой-то текст", "Other text": "Другой текст"}